@@ -18,6 +18,9 @@ test_fixtures_and_their_expectations = [
 import copy
 
 from dataclasses import dataclass
+from datetime import date, timedelta
+from random import Random
+from typing import Sequence
 
 from wb_st_challenge.constants import (
     HIGH_COST_FULL_DAY_RATE,
@@ -228,3 +231,32 @@ def get_set_6_expectation() -> Expectation:
         low_cost_full_days=1,
         low_cost_travel_days=1,
     )
+
+
+# ------------------------------------
+# For tests that run over every set
+# ------------------------------------
+ALL_SETS = [get_set_1, get_set_2, get_set_3, get_set_4, get_set_5, get_set_6]
+
+
+# ------------------------------------
+# Random data
+# ------------------------------------
+def random_projects(
+    rnd: Random,
+    count: int,
+    days: int = 30,
+    span: int = 5,
+    zones: Sequence[str] = ('high', 'low'),
+    first_day: date = date(2024, 10, 1),
+) -> list:
+    """
+    Returns `count` random project dictionaries. Each one starts up to `days` days after `first_day`, and ends up to
+    `span` days after it starts.
+    """
+    data = []
+    for _ in range(count):
+        start = first_day + timedelta(days=rnd.randint(0, days))
+        end = start + timedelta(days=rnd.randint(0, span))
+        data.append({'start_date': start.isoformat(), 'end_date': end.isoformat(), 'cost_zone': rnd.choice(zones)})
+    return data
@@ -0,0 +1,140 @@
+import gzip
+import json
+import os
+import tempfile
+
+from datetime import date
+from pathlib import Path
+from random import Random
+from unittest import TestCase
+from unittest.mock import patch
+
+from wb_st_challenge import batch, processor
+
+from . import fixtures
+
+
+class ProcessBatchTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = Path(self.tmp.name) / 'archive.csv'
+        self.checkpoint = Path(self.tmp.name) / 'archive.checkpoint'
+
+        rnd = Random(37)
+        self.datasets = {
+            f'employee {index}': fixtures.random_projects(
+                rnd, rnd.randint(1, 8), days=60, span=6, zones=['high', 'low', 'High']
+            )
+            for index in range(30)
+        }
+        lines = ['employee,start_date,end_date,cost_zone'] + [
+            f'"{employee}",{p["start_date"]},{p["end_date"]},{p["cost_zone"]}'
+            for employee, data in self.datasets.items()
+            for p in data
+        ]
+        self.content = '\r\n'.join(lines).encode() + b'\r\n'
+        self.filename.write_bytes(self.content)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def expected(self, window=None):
+        return {employee: processor.process_data(data, window=window) for employee, data in self.datasets.items()}
+
+    def interrupted_run(self, calls_before_kill, **kwargs):
+        """Runs a batch that gets killed (by a KeyboardInterrupt) during the given call to process_data."""
+        process_data = processor.process_data
+        calls = []
+
+        def killed_eventually(*args, **kw):
+            calls.append(None)
+            if len(calls) > calls_before_kill:
+                raise KeyboardInterrupt
+            return process_data(*args, **kw)
+
+        with patch('wb_st_challenge.batch.processor.process_data', side_effect=killed_eventually):
+            with self.assertRaises(KeyboardInterrupt):
+                batch.process_batch(self.filename, checkpoint=self.checkpoint, interval=0, **kwargs)
+
+    def test_matches_process_data_per_employee(self):
+        results = batch.process_batch(self.filename)
+        self.assertEqual(results, self.expected())
+        self.assertEqual(list(results), list(self.datasets))
+
+    def test_resuming_gives_the_same_results_as_an_uninterrupted_run(self):
+        for calls_before_kill in (0, 1, 17, 29):
+            with self.subTest(calls_before_kill=calls_before_kill):
+                self.interrupted_run(calls_before_kill)
+                self.assertEqual(self.checkpoint.exists(), calls_before_kill > 0)
+
+                results = batch.process_batch(self.filename, checkpoint=self.checkpoint, resume=True, interval=0)
+                self.assertEqual(results, self.expected())
+                self.assertFalse(self.checkpoint.exists())
+
+    def test_checkpoints_hold_the_completed_employees(self):
+        self.interrupted_run(10)
+
+        checkpoint = batch.Checkpoint.load(self.checkpoint)
+        self.assertEqual(
+            checkpoint.results, {employee: self.expected()[employee] for employee in list(self.datasets)[:10]}
+        )
+        offset = checkpoint.offset
+        self.assertEqual(self.content[offset:].split(b',')[0], b'"employee 10"')
+        self.assertEqual(checkpoint.line, 1 + sum(len(self.datasets[employee]) for employee in checkpoint.results))
+
+    def test_resuming_a_compressed_file_with_a_window(self):
+        self.filename.write_bytes(gzip.compress(self.content))
+        window = (date(2024, 10, 10), date(2024, 10, 25))
+
+        self.interrupted_run(12, window=window)
+        results = batch.process_batch(self.filename, checkpoint=self.checkpoint, resume=True, window=window)
+        self.assertEqual(results, self.expected(window))
+
+    def test_a_checkpoint_for_another_window_is_rejected(self):
+        self.interrupted_run(5)
+        with self.assertRaisesRegex(ValueError, 'checkpoint'):
+            batch.process_batch(self.filename, checkpoint=self.checkpoint, resume=True, window=(date.min, date.max))
+
+    def test_a_checkpoint_for_a_changed_file_is_rejected(self):
+        for content in (
+            self.content + b'employee 99,2024-10-01,2024-10-02,low\r\n',
+            self.content.replace(b'low', b'Low'),
+        ):
+            with self.subTest(content=content[-40:]):
+                self.interrupted_run(5)
+                stat = self.filename.stat()
+                self.filename.write_bytes(content)
+                # Make sure the modification time changes, even on file systems with a coarse resolution
+                os.utime(self.filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+                with self.assertRaisesRegex(ValueError, 'checkpoint .* is for an earlier version'):
+                    batch.process_batch(self.filename, checkpoint=self.checkpoint, resume=True)
+
+    def test_a_checkpoint_is_not_used_without_resume(self):
+        self.checkpoint.write_text(json.dumps({'version': batch.CHECKPOINT_VERSION + 1}))
+        self.assertEqual(batch.process_batch(self.filename, checkpoint=self.checkpoint), self.expected())
+
+        self.checkpoint.write_text(json.dumps({'version': batch.CHECKPOINT_VERSION + 1}))
+        with self.assertRaisesRegex(ValueError, 'Unsupported checkpoint version'):
+            batch.process_batch(self.filename, checkpoint=self.checkpoint, resume=True)
+
+    def test_rows_of_an_employee_must_be_grouped_together(self):
+        self.filename.write_bytes(self.content + b'employee 3,2024-05-01,2024-05-02,low\r\n')
+        line = len(self.content.splitlines()) + 1
+        with self.assertRaisesRegex(ValueError, f"^Line {line}: .*'employee 3'"):
+            batch.process_batch(self.filename)
+
+    def test_without_an_employee_column(self):
+        self.filename.write_bytes(
+            b'start_date,end_date,cost_zone\n2024-01-25,2024-02-03,low\n\n2024-02-03,2024-02-05,high\n'
+        )
+        self.assertEqual(
+            batch.process_batch(self.filename), {'': processor.process_data(processor.get_data_from_csv(self.filename))}
+        )
+
+    def test_combine_results(self):
+        results = self.expected()
+        combined = batch.combine_results(results)
+        self.assertEqual(combined.total, sum(result.total for result in results.values()))
+        self.assertEqual(combined.low_cost_travel_days, sum(result.low_cost_travel_days for result in results.values()))
+        self.assertEqual(batch.combine_results({}), processor.ReimbursementResult())
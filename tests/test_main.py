@@ -1,3 +1,9 @@
+import io
+import os
+import tempfile
+import threading
+
+from datetime import date
 from pathlib import Path
 from unittest import TestCase
 from unittest.mock import Mock, call, patch
@@ -5,6 +11,9 @@ from unittest.mock import Mock, call, patch
 from wb_st_challenge import __main__ as main
 
 
+EXAMPLE_FILE = Path(__file__).parent.parent / 'data_file_example.csv'
+
+
 class MainRunTest(TestCase):
     @patch('wb_st_challenge.__main__.processor')
     @patch('builtins.print')
@@ -15,6 +24,7 @@ class MainRunTest(TestCase):
             high_cost_travel_days=1,
             low_cost_full_days=2,
             low_cost_travel_days=3,
+            removed_rows=0,
         )
 
         filename = '/some/path/file.csv'
@@ -23,7 +33,9 @@ class MainRunTest(TestCase):
         self.assertEqual(exit_code, 0)
 
         m_processor.get_data_from_csv.assert_called_once_with(Path(filename))
-        m_processor.process_data.assert_called_once_with(m_processor.get_data_from_csv.return_value)
+        m_processor.process_data.assert_called_once_with(
+            m_processor.get_data_from_csv.return_value, quarantine=None, window=None
+        )
         m_print.assert_has_calls(
             [
                 call('Total: $525.11'),
@@ -35,6 +47,168 @@ class MainRunTest(TestCase):
         )
 
 
+class MainRunParallelTest(TestCase):
+    @patch('wb_st_challenge.__main__.parallel')
+    @patch('wb_st_challenge.__main__.processor')
+    @patch('builtins.print')
+    def test_jobs_parse_the_file_in_parallel(self, m_print, m_processor, m_parallel):
+        m_processor.process_projects.return_value = Mock(total=0.0, removed_rows=0)
+        exit_code = main.run('/some/path/file.csv', jobs=4)
+        self.assertEqual(exit_code, 0)
+
+        m_parallel.parse_csv_in_parallel.assert_called_once_with(Path('/some/path/file.csv'), 4)
+        m_processor.process_projects.assert_called_once_with(m_parallel.parse_csv_in_parallel.return_value, window=None)
+        m_processor.get_data_from_csv.assert_not_called()
+
+    @patch('builtins.print')
+    def test_same_result_as_a_single_process(self, m_print):
+        main.run(str(EXAMPLE_FILE), jobs=2)
+        m_print.assert_any_call('Total: $870.00')
+
+
+class MainRunStreamTest(TestCase):
+    @patch('builtins.print')
+    def test_reading_from_stdin(self, m_print):
+        stdin = Mock(buffer=io.BytesIO(EXAMPLE_FILE.read_bytes()))
+        with patch('wb_st_challenge.__main__.sys.stdin', stdin):
+            exit_code = main.run(main.STDIN)
+
+        self.assertEqual(exit_code, 0)
+        m_print.assert_any_call('Total: $870.00')
+
+    @patch('builtins.print')
+    def test_reading_from_a_named_pipe(self, m_print):
+        with tempfile.TemporaryDirectory() as tmp:
+            fifo = os.path.join(tmp, 'projects.fifo')
+            os.mkfifo(fifo)
+
+            def write():
+                with open(fifo, 'wb') as stream:
+                    stream.write(EXAMPLE_FILE.read_bytes())
+
+            writer = threading.Thread(target=write)
+            writer.start()
+            exit_code = main.run(fifo)
+            writer.join()
+
+        self.assertEqual(exit_code, 0)
+        m_print.assert_any_call('Total: $870.00')
+
+
+class MainRunDuplicatesTest(TestCase):
+    @patch('builtins.print')
+    def test_removed_rows_are_reported(self, m_print):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = Path(tmp) / 'projects.csv'
+            rows = EXAMPLE_FILE.read_text().splitlines()
+            filename.write_text('\n'.join(rows + rows[1:]) + '\n')
+            main.run(str(filename))
+
+        m_print.assert_any_call('Total: $870.00')
+        m_print.assert_any_call('Removed Duplicate Rows: 2')
+
+    @patch('builtins.print')
+    def test_nothing_is_reported_without_duplicates(self, m_print):
+        main.run(str(EXAMPLE_FILE))
+        self.assertNotIn('Removed', ' '.join(str(args) for args in m_print.call_args_list))
+
+
+class MainRunQuarantineTest(TestCase):
+    @patch('builtins.print')
+    def test_invalid_rows_are_quarantined(self, m_print):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = Path(tmp) / 'projects.csv'
+            filename.write_bytes(EXAMPLE_FILE.read_bytes() + b'2024-10-01,not a date,high\n')
+            quarantine = Path(tmp) / 'rejected.csv'
+
+            exit_code = main.run(str(filename), jobs=2, quarantine=str(quarantine))
+            rejected = quarantine.read_text().splitlines()
+
+        self.assertEqual(exit_code, 0)
+        m_print.assert_any_call('Total: $870.00')
+        m_print.assert_any_call('Quarantined Rows: 1')
+        self.assertEqual(len(rejected), 2)
+        self.assertTrue(rejected[1].startswith(f"{len(EXAMPLE_FILE.read_text().splitlines()) + 1},Invalid end_date: "))
+
+    @patch('builtins.print')
+    def test_line_numbers_count_blank_lines_and_line_breaks_in_values(self, m_print):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = Path(tmp) / 'projects.csv'
+            filename.write_bytes(
+                b'start_date,end_date,cost_zone\n2024-10-01,2024-10-02,"low"\n\n2024-10-03,2024-10-04,"Multi\nline"\n'
+                b'\n2024-10-05,soon,high\n'
+            )
+            quarantine = Path(tmp) / 'rejected.csv'
+
+            main.run(str(filename), quarantine=str(quarantine))
+            rejected = quarantine.read_text().splitlines()
+
+        m_print.assert_any_call('Quarantined Rows: 2')
+        self.assertTrue(rejected[1].startswith('4,Unknown cost_zone: '))
+        self.assertTrue(rejected[-1].startswith('7,Invalid end_date: '))
+
+
+class MainRunWindowTest(TestCase):
+    @patch('builtins.print')
+    def test_only_days_in_the_window_are_reimbursed(self, m_print):
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                main.run(str(EXAMPLE_FILE), jobs=jobs, window=(date(2024, 2, 1), date(2024, 2, 29)))
+                m_print.assert_any_call('Total: $375.00')
+                m_print.assert_any_call('Low Cost Full Days: 2')
+
+
+class MainRunBatchTest(TestCase):
+    @patch('builtins.print')
+    def test_totals_per_employee_and_combined(self, m_print):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = Path(tmp) / 'archive.csv'
+            rows = EXAMPLE_FILE.read_text().splitlines()
+            filename.write_text(
+                '\n'.join(['employee,' + rows[0]] + [f'{name},{row}' for name in 'ab' for row in rows[1:]])
+            )
+            checkpoint = Path(tmp) / 'archive.checkpoint'
+
+            exit_code = main.run_batch(str(filename), checkpoint, resume=True)
+            self.assertFalse(checkpoint.exists())
+
+        self.assertEqual(exit_code, 0)
+        m_print.assert_has_calls(
+            [
+                call("Employee 'a': $870.00"),
+                call("Employee 'b': $870.00"),
+                call('Total: $1740.00'),
+                call('High Cost Full Days: 4'),
+            ]
+        )
+
+
+class ParseArgsTest(TestCase):
+    def test_parse_args(self):
+        fixtures_and_expectations = [
+            (['file.csv'], ('file.csv', {})),
+            (['-'], ('-', {})),
+            (['--jobs', '4', 'file.csv'], ('file.csv', {'jobs': 4})),
+            (['file.csv', '--jobs', '4'], ('file.csv', {'jobs': 4})),
+            (['--quarantine', 'bad.csv', 'file.csv'], ('file.csv', {'quarantine': 'bad.csv'})),
+            (['--window', '2024-07-01:2024-09-30', '-'], ('-', {'window': (date(2024, 7, 1), date(2024, 9, 30))})),
+            (['--window', '2024-07-01', 'file.csv'], None),
+            (
+                ['--checkpoint', 'cp.json', '--resume', 'file.csv'],
+                ('file.csv', {'checkpoint': Path('cp.json'), 'resume': True}),
+            ),
+            (['--window', '2024-09-30:2024-07-01', 'file.csv'], None),
+            ([], None),
+            (['file.csv', 'other.csv'], None),
+            (['--jobs', 'file.csv'], None),
+            (['file.csv', '--jobs'], None),
+        ]
+
+        for args, expected in fixtures_and_expectations:
+            with self.subTest(args=args):
+                self.assertEqual(main.parse_args(args), expected)
+
+
 class MainTest(TestCase):
     @patch('wb_st_challenge.__main__.os')
     @patch('wb_st_challenge.__main__.run')
@@ -61,7 +235,7 @@ class MainTest(TestCase):
         exit_code = main.main(args)
         m_print.assert_has_calls(
             [
-                call('Usage: python -m wb_st_challenge <filename>'),
+                call(main.USAGE),
             ]
         )
         self.assertEqual(exit_code, 1)
@@ -77,7 +251,7 @@ class MainTest(TestCase):
             exit_code = main.main(args)
             m_print.assert_has_calls(
                 [
-                    call('Usage: python -m wb_st_challenge <filename>'),
+                    call(main.USAGE),
                 ]
             )
             self.assertEqual(exit_code, 1)
@@ -116,3 +290,70 @@ class MainTest(TestCase):
             m_run.assert_not_called()
             m_os.path.exists.assert_called_once_with('some_filename.xyz')
             m_os.path.isfile.assert_called_once_with('some_filename.xyz')
+
+    @patch('wb_st_challenge.__main__.os')
+    @patch('wb_st_challenge.__main__.run')
+    @patch('builtins.print')
+    def test_stdin_is_allowed(self, m_print, m_run, m_os):
+        exit_code = main.main([None, '-'])
+        m_print.assert_not_called()
+        self.assertEqual(exit_code, m_run.return_value)
+        m_run.assert_called_once_with('-')
+        m_os.path.exists.assert_not_called()
+
+    @patch('wb_st_challenge.__main__.Path')
+    @patch('wb_st_challenge.__main__.os')
+    @patch('wb_st_challenge.__main__.run')
+    @patch('builtins.print')
+    def test_named_pipes_are_allowed(self, m_print, m_run, m_os, m_path):
+        m_os.path.exists.return_value = True
+        m_os.path.isfile.return_value = False
+        m_path.return_value.is_fifo.return_value = True
+
+        exit_code = main.main([None, 'some_pipe'])
+        m_print.assert_not_called()
+        self.assertEqual(exit_code, m_run.return_value)
+        m_run.assert_called_once_with('some_pipe')
+        m_path.assert_called_once_with('some_pipe')
+
+    @patch('wb_st_challenge.__main__.os')
+    @patch('wb_st_challenge.__main__.run')
+    @patch('builtins.print')
+    def test_options_are_passed_on(self, m_print, m_run, m_os):
+        m_os.path.exists.return_value = True
+        m_os.path.isfile.return_value = True
+
+        exit_code = main.main([None, '--jobs', '3', 'some_filename.xyz'])
+        m_print.assert_not_called()
+        self.assertEqual(exit_code, m_run.return_value)
+        m_run.assert_called_once_with('some_filename.xyz', jobs=3)
+
+    @patch('wb_st_challenge.__main__.os')
+    @patch('wb_st_challenge.__main__.run_batch')
+    @patch('builtins.print')
+    def test_checkpoints_run_a_batch(self, m_print, m_run_batch, m_os):
+        m_os.path.exists.return_value = True
+        m_os.path.isfile.return_value = True
+
+        exit_code = main.main([None, '--checkpoint', 'cp.json', '--resume', 'archive.csv'])
+        m_print.assert_not_called()
+        self.assertEqual(exit_code, m_run_batch.return_value)
+        m_run_batch.assert_called_once_with('archive.csv', checkpoint=Path('cp.json'), resume=True)
+
+    @patch('wb_st_challenge.__main__.os')
+    @patch('wb_st_challenge.__main__.run_batch')
+    @patch('builtins.print')
+    def test_invalid_batch_options(self, m_print, m_run_batch, m_os):
+        m_os.path.exists.return_value = True
+        m_os.path.isfile.return_value = True
+
+        for args in (['--resume', 'archive.csv'], ['--checkpoint', 'cp.json', '--jobs', '2', 'archive.csv']):
+            with self.subTest(args=args):
+                m_print.reset_mock()
+                self.assertEqual(main.main([None, *args]), 1)
+                m_print.assert_called_once_with(main.USAGE)
+
+        m_print.reset_mock()
+        self.assertEqual(main.main([None, '--checkpoint', 'cp.json', '-']), 1)
+        m_print.assert_called_once_with("Error: '-' must be a regular file to use a checkpoint.")
+        m_run_batch.assert_not_called()
@@ -0,0 +1,140 @@
+import gzip
+import tempfile
+
+from datetime import date
+from pathlib import Path
+from random import Random
+from unittest import TestCase
+
+from wb_st_challenge import parallel, processor
+
+from . import fixtures
+
+
+class EncodeProjectsTest(TestCase):
+    def test_round_trip(self):
+        projects = processor.parse_data_into_list_of_projects(fixtures.get_set_2() + fixtures.get_set_3())
+        zone_table = ['low', 'high']
+
+        starts, ends, zones = parallel.encode_projects(projects, zone_table)
+        self.assertEqual(list(starts[:2]), [date(2024, 10, 1).toordinal(), date(2024, 9, 30).toordinal()])
+        self.assertEqual(parallel.decode_projects(starts, ends, zones, zone_table), projects)
+
+    def test_many_cost_zones(self):
+        projects = [(date(2024, 10, 1), date(2024, 10, 2), f'zone {index}') for index in range(1000)]
+        zone_table = []
+
+        starts, ends, zones = parallel.encode_projects(projects, zone_table)
+        self.assertEqual(parallel.decode_projects(starts, ends, zones, zone_table), projects)
+
+        data = [[{'start_date': '2024-10-01', 'end_date': '2024-10-02', 'cost_zone': zone}] for *_, zone in projects]
+        self.assertEqual(parallel.process_many(data, processes=2), [processor.process_data(d) for d in data])
+
+    def test_unknown_cost_zones_are_added_to_the_zone_table(self):
+        projects = [(date(2024, 10, 1), date(2024, 10, 2), 'medium'), (date(2024, 10, 3), date(2024, 10, 3), 'low')]
+        zone_table = ['low', 'high']
+
+        _, _, zones = parallel.encode_projects(projects, zone_table)
+        self.assertEqual(zone_table, ['low', 'high', 'medium'])
+        self.assertEqual(list(zones), [2, 0])
+
+
+class ProcessManyTest(TestCase):
+    def test_matches_process_data(self):
+        rnd = Random(27)
+        datasets = [
+            fixtures.get_set_1(),
+            fixtures.get_set_2(),
+            [],
+            fixtures.get_set_3(),
+            fixtures.get_set_4(),
+            fixtures.get_set_5(),
+            fixtures.get_set_6(),
+        ]
+        for _ in range(50):
+            datasets.append(fixtures.random_projects(rnd, rnd.randint(0, 8), days=20, zones=['high', 'low', 'medium']))
+
+        results = parallel.process_many(datasets, processes=2)
+        self.assertEqual(results, [processor.process_data(data) for data in datasets])
+
+    def test_with_no_projects(self):
+        self.assertEqual(parallel.process_many([]), [])
+        self.assertEqual(parallel.process_many([[], []]), [processor.ReimbursementResult()] * 2)
+
+
+class ParseCSVInParallelTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = Path(self.tmp.name) / 'projects.csv'
+
+        rnd = Random(31)
+        data = fixtures.random_projects(rnd, 500, days=300, span=10, zones=['high', 'low', 'High'])
+        self.lines = ['start_date,end_date,cost_zone'] + [
+            f"{p['start_date']},{p['end_date']},{p['cost_zone']}" for p in data
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, lines, line_ending='\n'):
+        self.filename.write_bytes(line_ending.join(lines).encode() + line_ending.encode())
+
+    def test_matches_serial_parsing(self):
+        for line_ending in ('\n', '\r\n'):
+            self.write(self.lines, line_ending)
+            expected = processor.parse_data_into_list_of_projects(processor.get_data_from_csv(self.filename))
+
+            for jobs in (1, 2, 3, 8):
+                with self.subTest(line_ending=line_ending, jobs=jobs):
+                    self.assertEqual(parallel.parse_csv_in_parallel(self.filename, jobs), expected)
+
+    def test_more_jobs_than_rows(self):
+        self.write(self.lines[:3])
+        expected = processor.parse_data_into_list_of_projects(processor.get_data_from_csv(self.filename))
+        self.assertEqual(parallel.parse_csv_in_parallel(self.filename, 16), expected)
+
+    def test_header_only(self):
+        self.write(self.lines[:1])
+        self.assertEqual(parallel.parse_csv_in_parallel(self.filename, 4), [])
+
+    def test_compressed_files_are_parsed_serially(self):
+        self.filename.write_bytes(gzip.compress('\n'.join(self.lines).encode()))
+        expected = processor.parse_data_into_list_of_projects(processor.get_data_from_csv(self.filename))
+        self.assertEqual(parallel.parse_csv_in_parallel(self.filename, 4), expected)
+
+    def test_errors_report_the_line_number_of_the_first_bad_row(self):
+        self.lines[400] = '2024-13-01,2024-01-05,low'
+        self.lines[450] = 'not,a,date'
+        self.write(self.lines)
+
+        for jobs in (1, 2, 4):
+            with self.subTest(jobs=jobs):
+                with self.assertRaisesRegex(ValueError, '^Line 401: '):
+                    parallel.parse_csv_in_parallel(self.filename, jobs)
+
+        with self.subTest('compressed'):
+            self.filename.write_bytes(gzip.compress('\n'.join(self.lines).encode()))
+            with self.assertRaisesRegex(ValueError, '^Line 401: '):
+                parallel.parse_csv_in_parallel(self.filename, 4)
+
+    def test_rows_missing_columns_are_reported(self):
+        self.lines[10] = '2024-01-01'
+        self.write(self.lines)
+
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                with self.assertRaisesRegex(ValueError, '^Line 11: '):
+                    parallel.parse_csv_in_parallel(self.filename, jobs)
+
+        self.lines[0] = 'begin,end_date,cost_zone'
+        self.write(self.lines)
+        for jobs in (1, 2):
+            with self.subTest('missing header column', jobs=jobs):
+                with self.assertRaisesRegex(ValueError, "^Line 2: 'start_date'$"):
+                    parallel.parse_csv_in_parallel(self.filename, jobs)
+
+    def test_more_cost_zones_than_fit_in_a_byte(self):
+        self.lines[1:] = [f'2024-01-01,2024-01-{day % 28 + 1:02},zone {day}' for day in range(600)]
+        self.write(self.lines)
+        expected = processor.parse_data_into_list_of_projects(processor.get_data_from_csv(self.filename))
+        self.assertEqual(parallel.parse_csv_in_parallel(self.filename, 2), expected)
@@ -1,11 +1,23 @@
-from datetime import date
+import bz2
+import dataclasses
+import gzip
+import io
+import lzma
+import os
+import tempfile
+import threading
+import time
+
+from array import array
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from random import shuffle
+from random import Random, shuffle
 from unittest import TestCase
 from unittest.mock import patch
 
 from wb_st_challenge import processor
 from wb_st_challenge.constants import (
+    COST_ZONES,
     HIGH_COST_FULL_DAY_RATE,
     HIGH_COST_TRAVEL_DAY_RATE,
     LOW_COST_FULL_DAY_RATE,
@@ -71,6 +83,151 @@ class ProcesserGeneralTest(TestCase):
                 self.assertEqual(result[2][0], date(2024, 2, 12))
 
 
+class NormaliseDataTest(TestCase):
+    def test_exact_duplicates_are_removed(self):
+        data = [
+            {'start_date': '2024-10-01', 'end_date': '2024-10-03', 'cost_zone': 'low'},
+            {'start_date': '2024-10-01', 'end_date': '2024-10-03', 'cost_zone': 'low'},
+            {'start_date': '2024-10-02', 'end_date': '2024-10-05', 'cost_zone': 'high'},
+            {'start_date': '2024-10-01', 'end_date': '2024-10-03', 'cost_zone': 'low'},
+        ]
+        rows, removed = processor.normalise_data(data)
+        self.assertEqual(rows, [data[0], data[2]])
+        self.assertEqual(removed, 2)
+
+    def test_rows_contained_in_a_same_zone_sibling_ending_the_same_day_are_removed(self):
+        data = [
+            {'start_date': '2024-10-03', 'end_date': '2024-10-05', 'cost_zone': 'high'},
+            {'start_date': '2024-10-01', 'end_date': '2024-10-05', 'cost_zone': 'High'},
+            {'start_date': '2024-10-04', 'end_date': '2024-10-05', 'cost_zone': 'low'},
+        ]
+        rows, removed = processor.normalise_data(data)
+        self.assertEqual(rows, [data[1], data[2]])
+        self.assertEqual(removed, 1)
+
+    def test_rows_contained_in_a_sibling_ending_later_are_kept(self):
+        """Removing these would change the result, see the `normalise_data` docstring."""
+        data = [
+            {'start_date': '2024-10-01', 'end_date': '2024-10-10', 'cost_zone': 'high'},
+            {'start_date': '2024-10-05', 'end_date': '2024-10-05', 'cost_zone': 'high'},
+            {'start_date': '2024-10-01', 'end_date': '2024-10-04', 'cost_zone': 'high'},
+        ]
+        rows, removed = processor.normalise_data(data)
+        self.assertEqual(rows, data)
+        self.assertEqual(removed, 0)
+
+    def test_empty_list(self):
+        self.assertEqual(processor.normalise_data([]), ([], 0))
+
+    def test_process_data_reports_the_removed_rows(self):
+        data = fixtures.get_set_4()
+        result = processor.process_data(data + data[:1])
+        self.assertEqual(result.removed_rows, 2)
+        self.assertEqual(result, processor.process_data(data))
+        self.assertEqual(processor.process_data(fixtures.get_set_1()).removed_rows, 0)
+
+    def test_results_are_unchanged(self):
+        def process_without_normalising(data):
+            return processor.process_projects(processor.parse_data_into_list_of_projects(data))
+
+        rnd = Random(28)
+        for _ in range(500):
+            data = fixtures.random_projects(rnd, rnd.randint(1, 10), days=12, span=4)
+            data += rnd.sample(data, k=rnd.randint(0, len(data)))
+
+            with self.subTest(data=data):
+                rows, _ = processor.normalise_data(data)
+                self.assertEqual(process_without_normalising(rows), process_without_normalising(data))
+
+
+class LenientParsingTest(TestCase):
+    def test_validate_project(self):
+        fixtures_and_expectations = [
+            ({'start_date': '2024-10-01', 'end_date': '2024-10-03', 'cost_zone': 'High'}, None),
+            ({'start_date': '', 'end_date': '2024-10-03', 'cost_zone': 'low'}, 'Missing start_date'),
+            ({'start_date': '2024-10-01', 'cost_zone': 'low'}, 'Missing end_date'),
+            ({'start_date': '2024-10-01', 'end_date': '2024-10-03', 'cost_zone': None}, 'Missing cost_zone'),
+            ({'start_date': '2024-13-01', 'end_date': '2024-10-03', 'cost_zone': 'low'}, 'Invalid start_date: '),
+            ({'start_date': '2024-10-01', 'end_date': 20241003, 'cost_zone': 'low'}, 'Invalid end_date: '),
+            ({'start_date': '2024-10-03', 'end_date': '2024-10-01', 'cost_zone': 'low'}, 'end_date is before'),
+            (
+                {'start_date': '2024-10-01', 'end_date': '2024-10-03', 'cost_zone': 'medium'},
+                "Unknown cost_zone: 'medium'",
+            ),
+            ({'start_date': '2024-10-01', 'end_date': '2024-10-03', 'cost_zone': 1}, 'Invalid cost_zone: 1'),
+        ]
+
+        for p, reason in fixtures_and_expectations:
+            with self.subTest(p=p):
+                if reason is None:
+                    self.assertEqual(processor.validate_project(p), (date(2024, 10, 1), date(2024, 10, 3), 'high'))
+                else:
+                    with self.assertRaisesRegex(ValueError, f'^{reason}'):
+                        processor.validate_project(p)
+
+    def test_invalid_rows_are_quarantined_with_their_line_number(self):
+        data = [
+            {'start_date': '2024-10-01', 'end_date': '2024-10-03', 'cost_zone': 'low'},
+            {'start_date': '2024-10-05', 'end_date': '2024-10-04', 'cost_zone': 'high'},
+            {'start_date': '2024-10-04', 'end_date': '2024-10-05', 'cost_zone': 'high'},
+            {'start_date': 'soon', 'end_date': '2024-10-05', 'cost_zone': 'high'},
+        ]
+        csv_file = io.StringIO()
+        quarantine = processor.Quarantine(csv_file)
+
+        projects = processor.parse_data_leniently(data, quarantine)
+        self.assertEqual(projects, processor.parse_data_into_list_of_projects([data[0], data[2]]))
+        self.assertEqual(quarantine.count, 2)
+        self.assertEqual(
+            csv_file.getvalue().splitlines(),
+            [
+                'line,reason,start_date,end_date,cost_zone',
+                '3,end_date is before start_date,2024-10-05,2024-10-04,high',
+                "5,Invalid start_date: time data 'soon' does not match format '%Y-%m-%d',soon,2024-10-05,high",
+            ],
+        )
+
+    def test_line_numbers_of_csv_rows_count_blank_lines_and_line_breaks_in_values(self):
+        stream = io.BytesIO(
+            b'start_date,end_date,cost_zone,note\n'
+            b'2024-10-01,2024-10-03,low,"two\nlines"\n'
+            b'\n'
+            b'2024-10-05,2024-10-04,high,\n'
+            b'2024-10-04,2024-10-05,high,"three\n\nlines"\n'
+            b'soon,2024-10-05,high,\n'
+        )
+        csv_file = io.StringIO()
+        quarantine = processor.Quarantine(csv_file)
+
+        processor.parse_data_leniently(processor.get_data_from_stream(stream), quarantine)
+        self.assertEqual([row.split(',')[0] for row in csv_file.getvalue().splitlines()[1:]], ['5', '9'])
+
+    def test_process_data_with_a_quarantine(self):
+        for data, expectation in [
+            (fixtures.get_set_2(), fixtures.get_set_2_expectation()),
+            (fixtures.get_set_3(), fixtures.get_set_3_expectation()),
+        ]:
+            data.insert(1, {'start_date': '2024-09-30', 'end_date': '2024-09-30', 'cost_zone': 'unknown'})
+            quarantine = processor.Quarantine(io.StringIO())
+            result = processor.process_data(data, quarantine=quarantine)
+
+            self.assertEqual(result.total, expectation.total)
+            self.assertEqual(quarantine.count, 1)
+
+    def test_a_cost_zone_that_is_not_a_string_is_quarantined(self):
+        quarantine = processor.Quarantine(io.StringIO())
+        data = [
+            {'start_date': '2024-10-01', 'end_date': '2024-10-02', 'cost_zone': 1},
+            {'start_date': '2024-10-01', 'end_date': '2024-10-02', 'cost_zone': 'low'},
+        ]
+        self.assertEqual(processor.process_data(data, quarantine=quarantine), processor.process_data(data[1:]))
+        self.assertEqual(quarantine.count, 1)
+
+    def test_process_data_still_raises_without_a_quarantine(self):
+        with self.assertRaises(ValueError):
+            processor.process_data([{'start_date': 'soon', 'end_date': '2024-10-05', 'cost_zone': 'high'}])
+
+
 class MergeProjectsTest(TestCase):
     def test_merge_same_cost_zone(self):
         projects = [
@@ -181,6 +338,60 @@ class GetDataFromCSVTest(TestCase):
             processor.get_data_from_csv(filename)
 
 
+class CompressedInputTest(TestCase):
+    example_file = Path(__file__).parent.parent / 'data_file_example.csv'
+    compressors = [('gzip', gzip.compress), ('bz2', bz2.compress), ('xz', lzma.compress)]
+
+    def test_get_data_from_csv(self):
+        expected = processor.get_data_from_csv(self.example_file)
+
+        for name, compress in self.compressors:
+            with self.subTest(format=name), tempfile.TemporaryDirectory() as tmp:
+                filename = Path(tmp) / f'data_file.csv.{name}'
+                filename.write_bytes(compress(self.example_file.read_bytes()))
+                self.assertEqual(processor.get_data_from_csv(filename), expected)
+
+    def test_get_data_from_stream(self):
+        expected = processor.get_data_from_csv(self.example_file)
+
+        for name, compress in self.compressors:
+            compressed = compress(self.example_file.read_bytes())
+
+            with self.subTest(format=name, stream='peekable'):
+                stream = io.BufferedReader(io.BytesIO(compressed))
+                self.assertEqual(list(processor.get_data_from_stream(stream)), expected)
+                self.assertFalse(stream.closed)
+
+            with self.subTest(format=name, stream='seekable'):
+                stream = io.BytesIO(compressed)
+                self.assertEqual(list(processor.get_data_from_stream(stream)), expected)
+                self.assertFalse(stream.closed)
+
+    def test_pipe_that_delivers_the_magic_bytes_in_pieces(self):
+        expected = processor.get_data_from_csv(self.example_file)
+
+        for name, compress in self.compressors + [('none', bytes)]:
+            content = compress(self.example_file.read_bytes())
+            read_end, write_end = os.pipe()
+
+            def write():
+                with open(write_end, 'wb', buffering=0) as pipe:
+                    for piece in (content[:2], content[2:4], content[4:]):
+                        pipe.write(piece)
+                        time.sleep(0.05)
+
+            writer = threading.Thread(target=write)
+            writer.start()
+            with self.subTest(format=name), open(read_end, 'rb') as stream:
+                self.assertEqual(list(processor.get_data_from_stream(stream)), expected)
+            writer.join()
+
+    def test_uncompressed_streams_are_returned_as_is(self):
+        stream = io.BytesIO(self.example_file.read_bytes())
+        self.assertIs(processor.open_decompressed(stream), stream)
+        self.assertEqual(stream.tell(), 0)
+
+
 @patch("wb_st_challenge.processor.make_is_travel_day_tester", return_value=lambda d: False)
 class CalculateDailyRatesTest(TestCase):
     def test_one_high_cost_day(self, mock_travel_tester):
@@ -345,3 +556,342 @@ class CalculateDailyRatesTest(TestCase):
         }
 
         self.assertEqual(processor.calculate_daily_rates(merged), expected)
+
+
+class ProcessProjectsTest(TestCase):
+    def test_matches_process_data(self):
+        data = fixtures.get_set_5()
+        projects = processor.parse_data_into_list_of_projects(data)
+        self.assertEqual(processor.process_projects(projects), processor.process_data(data))
+
+    def test_empty_list(self):
+        self.assertEqual(processor.process_projects([]), processor.ReimbursementResult())
+
+
+class GetDataFromStreamTest(TestCase):
+    def test_rows_are_yielded_from_the_stream(self):
+        stream = io.BytesIO(b'start_date,end_date,cost_zone\n2024-10-01,2024-10-04,low\n2024-10-06,2024-10-06,high\n')
+        rows = processor.get_data_from_stream(stream)
+
+        self.assertEqual(next(rows), {'start_date': '2024-10-01', 'end_date': '2024-10-04', 'cost_zone': 'low'})
+        self.assertEqual(next(rows), {'start_date': '2024-10-06', 'end_date': '2024-10-06', 'cost_zone': 'high'})
+        with self.assertRaises(StopIteration):
+            next(rows)
+        self.assertFalse(stream.closed)
+
+    def test_rows_carry_the_line_they_start_on(self):
+        stream = io.BytesIO(
+            b'start_date,end_date,cost_zone\r\n\r\n2024-10-01,2024-10-04,"low\r\n"\r\n2024-10-06,2024-10-06,high\r\n'
+        )
+        self.assertEqual([row.line for row in processor.get_data_from_stream(stream)], [3, 5])
+
+    def test_process_data_consumes_the_stream(self):
+        filename = Path(__file__).parent.parent / 'data_file_example.csv'
+        with open(filename, 'rb') as stream:
+            result = processor.process_data(processor.get_data_from_stream(stream))
+
+        self.assertEqual(result, processor.process_data(processor.get_data_from_csv(filename)))
+
+    def test_empty_stream(self):
+        self.assertEqual(
+            processor.process_data(processor.get_data_from_stream(io.BytesIO())), processor.ReimbursementResult()
+        )
+
+
+class ProcessColumnsTest(TestCase):
+    fixtures_and_expectation = [
+        (fixtures.get_set_1(), fixtures.get_set_1_expectation()),
+        (fixtures.get_set_2(), fixtures.get_set_2_expectation()),
+        (fixtures.get_set_3(), fixtures.get_set_3_expectation()),
+        (fixtures.get_set_4(), fixtures.get_set_4_expectation()),
+        (fixtures.get_set_5(), fixtures.get_set_5_expectation()),
+        (fixtures.get_set_6(), fixtures.get_set_6_expectation()),
+    ]
+
+    def test_column_types(self):
+        def as_strings(fixture, key):
+            return [p[key] for p in fixture]
+
+        def as_dates(fixture, key):
+            return [processor.parse_date(p[key]) for p in fixture]
+
+        def as_datetimes(fixture, key):
+            return [datetime.strptime(p[key], '%Y-%m-%d') for p in fixture]
+
+        def as_ordinals(fixture, key):
+            return array('i', [processor.parse_date(p[key]).toordinal() for p in fixture])
+
+        def as_codes(fixture, key):
+            return memoryview(bytes(COST_ZONES.index(p[key]) for p in fixture))
+
+        for index, (fixture, expectation) in enumerate(self.fixtures_and_expectation):
+            for to_dates in (as_strings, as_dates, as_datetimes, as_ordinals):
+                for to_cost_zones in (as_strings, as_codes):
+                    with self.subTest(set=index + 1, dates=to_dates.__name__, cost_zones=to_cost_zones.__name__):
+                        result = processor.process_columns(
+                            to_dates(fixture, 'start_date'),
+                            to_dates(fixture, 'end_date'),
+                            to_cost_zones(fixture, 'cost_zone'),
+                        )
+                        self.assertEqual(result, processor.process_data(fixture))
+                        self.assertEqual(result.total, expectation.total)
+
+    def test_cost_zones_are_lower_cased(self):
+        result = processor.process_columns(['2024-10-01'], ['2024-10-03'], ['HIGH'])
+        self.assertEqual(result.high_cost_full_days, 1)
+        self.assertEqual(result.high_cost_travel_days, 2)
+
+    def test_empty_columns(self):
+        self.assertEqual(processor.process_columns([], [], []), processor.ReimbursementResult())
+
+    def test_unknown_cost_zone_codes_are_rejected(self):
+        for code in (-1, len(COST_ZONES)):
+            with self.subTest(code=code):
+                with self.assertRaisesRegex(ValueError, f'^Unknown cost zone code: {code}$'):
+                    processor.process_columns(['2024-10-01'], ['2024-10-03'], array('B' if code > 0 else 'b', [code]))
+
+    def test_columns_must_have_the_same_length(self):
+        with self.assertRaises(ValueError):
+            processor.process_columns(['2024-10-01'], ['2024-10-03', '2024-10-04'], ['high'])
+
+
+class SortedInputTest(TestCase):
+    @staticmethod
+    def random_data(rnd, count):
+        data = fixtures.random_projects(rnd, count)
+        # Sorted by end date then start date, but NOT by cost zone
+        return sorted(data, key=lambda p: (p['end_date'], p['start_date']))
+
+    def test_ensure_sorted(self):
+        projects = [
+            (date(2024, 10, 1), date(2024, 10, 2), 'low'),
+            (date(2024, 10, 2), date(2024, 10, 3), 'low'),
+            (date(2024, 10, 2), date(2024, 10, 3), 'high'),
+            (date(2024, 10, 1), date(2024, 10, 4), 'low'),
+        ]
+
+        with self.subTest('runs with the same dates are put in cost zone order'):
+            self.assertEqual(list(processor.ensure_sorted(projects)), sorted(projects, key=processor.project_sort_key))
+
+        with self.subTest('out of order'):
+            with self.assertRaisesRegex(
+                ValueError, r'^Project 2024-10-01 - 2024-10-02 \(low\) is out of order: it comes after 2024-10-01 - '
+            ):
+                list(processor.ensure_sorted(projects[1:] + projects[:1]))
+
+        with self.subTest('empty'):
+            self.assertEqual(list(processor.ensure_sorted([])), [])
+
+    def test_out_of_order_after_duplicates_were_removed(self):
+        data = [
+            {'start_date': '2024-10-01', 'end_date': '2024-10-03', 'cost_zone': 'low'},
+            {'start_date': '2024-10-01', 'end_date': '2024-10-03', 'cost_zone': 'low'},
+            {'start_date': '2024-10-01', 'end_date': '2024-10-03', 'cost_zone': 'low'},
+            {'start_date': '2024-10-05', 'end_date': '2024-10-06', 'cost_zone': 'high'},
+            {'start_date': '2024-10-02', 'end_date': '2024-10-04', 'cost_zone': 'high'},
+        ]
+        with self.assertRaisesRegex(
+            ValueError,
+            r'^Project 2024-10-02 - 2024-10-04 \(high\) is out of order: it comes after 2024-10-05 - 2024-10-06,',
+        ):
+            processor.process_data(data, presorted=True)
+
+    def test_presorted_data(self):
+        rnd = Random(33)
+        for _ in range(100):
+            data = self.random_data(rnd, rnd.randint(1, 10))
+            with self.subTest(data=data):
+                self.assertEqual(
+                    processor.parse_data_into_list_of_projects(data, presorted=True),
+                    processor.parse_data_into_list_of_projects(data),
+                )
+                self.assertEqual(processor.process_data(data, presorted=True), processor.process_data(data))
+
+        with self.subTest('unsorted data is rejected'):
+            with self.assertRaises(ValueError):
+                processor.process_data(fixtures.get_set_2() + fixtures.get_set_1(), presorted=True)
+
+    def test_process_sorted_sources(self):
+        rnd = Random(34)
+        for _ in range(100):
+            sources = [self.random_data(rnd, rnd.randint(0, 6)) for _ in range(rnd.randint(1, 4))]
+            with self.subTest(sources=sources):
+                self.assertEqual(
+                    processor.process_sorted_sources(iter(source) for source in sources),
+                    processor.process_data([p for source in sources for p in source]),
+                )
+
+        with self.subTest('unsorted sources are rejected'):
+            with self.assertRaises(ValueError):
+                processor.process_sorted_sources([fixtures.get_set_1(), fixtures.get_set_2() + fixtures.get_set_1()])
+
+
+class RateScenariosTest(TestCase):
+    @staticmethod
+    def total_with_rates(data, rates):
+        merged = processor.merge_projects(processor.parse_data_into_list_of_projects(data))
+        return processor.calculate_reimbursement_result(processor.calculate_daily_rates(merged, rates)).total
+
+    def test_default_rates(self):
+        self.assertEqual(
+            processor.RateTable(),
+            (HIGH_COST_FULL_DAY_RATE, HIGH_COST_TRAVEL_DAY_RATE, LOW_COST_FULL_DAY_RATE, LOW_COST_TRAVEL_DAY_RATE),
+        )
+        data = fixtures.get_set_6()
+        self.assertEqual(
+            processor.evaluate_rate_scenarios(data, [processor.RateTable()]), [processor.process_data(data).total]
+        )
+
+    def test_matches_a_full_run_per_scenario(self):
+        rnd = Random(34)
+        for _ in range(100):
+            data = fixtures.random_projects(rnd, rnd.randint(1, 10), days=15, zones=['high', 'low', 'medium'])
+            # Including scenarios that rank the rates differently, or have ties between them
+            scenarios = [processor.RateTable(*(rnd.randint(40, 90) for _ in range(4))) for _ in range(20)]
+            scenarios.append((60, 60, 60, 60))
+
+            with self.subTest(data=data):
+                self.assertEqual(
+                    processor.evaluate_rate_scenarios(data, scenarios),
+                    [self.total_with_rates(data, processor.RateTable(*rates)) for rates in scenarios],
+                )
+
+    def test_no_scenarios_or_no_data(self):
+        self.assertEqual(processor.evaluate_rate_scenarios(fixtures.get_set_1(), []), [])
+        self.assertEqual(processor.evaluate_rate_scenarios([], [processor.RateTable()] * 2), [0, 0])
+
+    def test_scenarios_need_all_four_rates(self):
+        for scenario in ((1, 2, 3), (1, 2, 3, 4, 5), ()):
+            with self.subTest(scenario=scenario):
+                with self.assertRaisesRegex(ValueError, f'^A scenario needs 4 rates, got {len(scenario)}'):
+                    processor.evaluate_rate_scenarios(fixtures.get_set_1(), [processor.RateTable(), scenario])
+
+
+class ReportingWindowTest(TestCase):
+    @staticmethod
+    def expected_in_window(data, window):
+        merged = processor.merge_projects(processor.parse_data_into_list_of_projects(data))
+        daily_rates = processor.calculate_daily_rates(merged)
+        return processor.calculate_reimbursement_result(
+            {day: rate for day, rate in daily_rates.items() if window[0] <= day <= window[1]}
+        )
+
+    def test_matches_the_full_history_clipped_to_the_window(self):
+        rnd = Random(36)
+        for _ in range(300):
+            data = fixtures.random_projects(rnd, rnd.randint(0, 10), days=40, span=8, zones=['high', 'low', 'medium'])
+            first_day = date(2024, 10, 1) + timedelta(days=rnd.randint(-5, 50))
+            window = (first_day, first_day + timedelta(days=rnd.randint(0, 15)))
+
+            with self.subTest(data=data, window=window):
+                expected = self.expected_in_window(data, window)
+                self.assertEqual(processor.process_data(data, window=window), expected)
+
+                data.sort(key=lambda p: (p['end_date'], p['start_date']))
+                self.assertEqual(processor.process_data(data, presorted=True, window=window), expected)
+
+    def test_whole_sequences_that_overlap_the_window_are_kept(self):
+        projects = processor.parse_data_into_list_of_projects(
+            [
+                {'start_date': '2024-01-01', 'end_date': '2024-01-05', 'cost_zone': 'low'},
+                {'start_date': '2024-06-01', 'end_date': '2024-06-20', 'cost_zone': 'low'},
+                {'start_date': '2024-06-21', 'end_date': '2024-07-03', 'cost_zone': 'high'},
+                {'start_date': '2024-07-02', 'end_date': '2024-07-02', 'cost_zone': 'high'},
+                {'start_date': '2024-07-04', 'end_date': '2024-07-10', 'cost_zone': 'low'},
+                {'start_date': '2024-09-30', 'end_date': '2024-10-02', 'cost_zone': 'high'},
+                {'start_date': '2024-10-04', 'end_date': '2024-10-08', 'cost_zone': 'high'},
+                {'start_date': '2024-12-20', 'end_date': '2024-12-24', 'cost_zone': 'low'},
+            ]
+        )
+        window = (date(2024, 7, 1), date(2024, 9, 30))
+        self.assertEqual(processor.restrict_to_window(projects, window), projects[1:6])
+        self.assertEqual(processor.restrict_to_window(projects, (date(2024, 8, 1), date(2024, 8, 31))), [])
+
+    def test_days_outside_the_window_are_not_calculated(self):
+        merged = [(date(2024, 1, 1), date(2024, 12, 31), 'high')]
+        daily_rates = processor.calculate_daily_rates(merged, window=(date(2024, 12, 1), date(2025, 1, 31)))
+        self.assertEqual(len(daily_rates), 31)
+        self.assertEqual(daily_rates[date(2024, 12, 31)], (HIGH_COST_TRAVEL_DAY_RATE, 'high', True))
+
+    def test_with_a_quarantine(self):
+        data = fixtures.get_set_4() + [{'start_date': 'soon', 'end_date': '2024-10-05', 'cost_zone': 'high'}]
+        window = (date(2024, 10, 2), date(2024, 10, 5))
+        quarantine = processor.Quarantine(io.StringIO())
+
+        result = processor.process_data(data, quarantine=quarantine, window=window)
+        self.assertEqual(result, self.expected_in_window(data[:-1], window))
+        self.assertEqual(quarantine.count, 1)
+
+
+class TripsTest(TestCase):
+    def test_trips_add_up_to_process_data(self):
+        # The five figures, i.e. not removed_rows, which describes the input
+        figures = [figure.name for figure in dataclasses.fields(processor.ReimbursementResult) if figure.compare]
+        for index, get_fixture in enumerate(fixtures.ALL_SETS):
+            with self.subTest(set=index + 1):
+                trips = processor.process_trips(get_fixture())
+                combined = {name: sum(getattr(trip.result, name) for trip in trips) for name in figures}
+                self.assertEqual(processor.ReimbursementResult(**combined), processor.process_data(get_fixture()))
+
+    def test_matches_the_daily_rates_of_each_trip(self):
+        rnd = Random(38)
+        for _ in range(300):
+            data = fixtures.random_projects(rnd, rnd.randint(0, 10), days=40, span=8, zones=['high', 'low', 'medium'])
+            rates = processor.RateTable(*(rnd.randint(40, 90) for _ in range(4)))
+            merged = processor.merge_projects(processor.parse_data_into_list_of_projects(data))
+            daily_rates = processor.calculate_daily_rates(merged, rates)
+
+            with self.subTest(data=data, rates=rates):
+                trips = processor.calculate_trips(merged, rates)
+                self.assertEqual(sum((trip.end_date - trip.start_date).days + 1 for trip in trips), len(daily_rates))
+                for trip in trips:
+                    self.assertEqual(
+                        trip.result,
+                        processor.calculate_reimbursement_result(
+                            {day: rate for day, rate in daily_rates.items() if trip.start_date <= day <= trip.end_date}
+                        ),
+                    )
+
+    def test_trips_are_separated_by_gaps(self):
+        trips = processor.process_trips(
+            [
+                {'start_date': '2024-09-01', 'end_date': '2024-09-03', 'cost_zone': 'low'},
+                {'start_date': '2024-09-03', 'end_date': '2024-09-05', 'cost_zone': 'high'},
+                {'start_date': '2024-09-07', 'end_date': '2024-09-08', 'cost_zone': 'high'},
+            ]
+        )
+        self.assertEqual(
+            trips,
+            [
+                processor.TripResult(
+                    date(2024, 9, 1),
+                    date(2024, 9, 5),
+                    processor.ReimbursementResult(
+                        total=LOW_COST_TRAVEL_DAY_RATE
+                        + LOW_COST_FULL_DAY_RATE
+                        + HIGH_COST_FULL_DAY_RATE * 2
+                        + HIGH_COST_TRAVEL_DAY_RATE,
+                        high_cost_full_days=2,
+                        high_cost_travel_days=1,
+                        low_cost_full_days=1,
+                        low_cost_travel_days=1,
+                    ),
+                ),
+                processor.TripResult(
+                    date(2024, 9, 7),
+                    date(2024, 9, 8),
+                    processor.ReimbursementResult(total=HIGH_COST_TRAVEL_DAY_RATE * 2, high_cost_travel_days=2),
+                ),
+            ],
+        )
+
+    def test_long_trips_are_not_expanded_day_by_day(self):
+        merged = [(date(1900, 1, 1), date(2099, 12, 31), 'high')]
+        (trip,) = processor.calculate_trips(merged)
+
+        days = (date(2099, 12, 31) - date(1900, 1, 1)).days + 1
+        self.assertEqual(trip.result.high_cost_full_days, days - 2)
+        self.assertEqual(trip.result.total, HIGH_COST_FULL_DAY_RATE * (days - 2) + HIGH_COST_TRAVEL_DAY_RATE * 2)
+
+    def test_with_no_projects(self):
+        self.assertEqual(processor.process_trips([]), [])
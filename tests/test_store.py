@@ -0,0 +1,92 @@
+import csv
+import tempfile
+
+from pathlib import Path
+from random import Random
+from unittest import TestCase
+
+from wb_st_challenge import processor
+from wb_st_challenge.store import ProjectStore
+
+from . import fixtures
+
+
+class ProjectStoreTest(TestCase):
+    def setUp(self):
+        self.store = ProjectStore()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_summary_matches_process_data_for_fixtures(self):
+        for index, get_fixture in enumerate(fixtures.ALL_SETS):
+            with self.subTest(set=index + 1):
+                employee = f'set {index + 1}'
+                self.store.add_projects(get_fixture(), employee=employee)
+                self.assertEqual(self.store.summary(employee), processor.process_data(get_fixture()))
+
+    def test_summary_matches_process_data_for_random_data(self):
+        rnd = Random(26)
+        for index in range(200):
+            data = fixtures.random_projects(rnd, rnd.randint(1, 8), days=20)
+
+            with self.subTest(data=data):
+                self.store.add_projects(data, employee=str(index))
+                self.assertEqual(self.store.summary(str(index)), processor.process_data(data))
+
+    def test_summary_for_unknown_employee(self):
+        self.assertEqual(self.store.summary('nobody'), processor.ReimbursementResult())
+
+    def test_summary_is_recalculated_after_adding_projects(self):
+        self.store.add_projects(fixtures.get_set_1(), employee='a')
+        self.store.add_projects(fixtures.get_set_2(), employee='b')
+        self.assertEqual(self.store.summary('a'), processor.process_data(fixtures.get_set_1()))
+        self.assertEqual(self.store.summary('b'), processor.process_data(fixtures.get_set_2()))
+
+        extra = [{'start_date': '2024-10-10', 'end_date': '2024-10-12', 'cost_zone': 'high'}]
+        self.store.add_projects(extra, employee='a')
+        self.assertEqual(self.store.summary('a'), processor.process_data(fixtures.get_set_1() + extra))
+        self.assertEqual(self.store.summary('b'), processor.process_data(fixtures.get_set_2()))
+
+    def test_load_csv_with_employee_column(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = Path(tmp) / 'projects.csv'
+            with open(filename, 'w', newline='') as csv_file:
+                writer = csv.DictWriter(csv_file, fieldnames=['employee', 'start_date', 'end_date', 'cost_zone'])
+                writer.writeheader()
+                writer.writerows({'employee': 'x', **p} for p in fixtures.get_set_3())
+                writer.writerows({'employee': 'y', **p} for p in fixtures.get_set_4())
+
+            self.assertEqual(self.store.load_csv(filename), 7)
+
+        self.assertEqual(self.store.employees(), ['x', 'y'])
+        self.assertEqual(self.store.summary('x'), processor.process_data(fixtures.get_set_3()))
+        self.assertEqual(self.store.summary('y'), processor.process_data(fixtures.get_set_4()))
+
+    def test_load_csv_without_employee_column(self):
+        filename = Path(__file__).parent.parent / 'data_file_example.csv'
+        self.assertEqual(self.store.load_csv(filename), 2)
+        self.assertEqual(self.store.employees(), [''])
+        self.assertEqual(self.store.summary(), processor.process_data(processor.get_data_from_csv(filename)))
+
+    def test_persists_between_connections(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            database = Path(tmp) / 'projects.sqlite3'
+            with ProjectStore(database) as store:
+                store.add_projects(fixtures.get_set_5(), employee='a')
+
+            with ProjectStore(database) as store:
+                self.assertEqual(store.summary('a'), processor.process_data(fixtures.get_set_5()))
+
+    def test_summaries_are_cached_per_rate_table(self):
+        rates = processor.RateTable(high_cost_full_day=90, low_cost_travel_day=40)
+        with tempfile.TemporaryDirectory() as tmp:
+            database = Path(tmp) / 'projects.sqlite3'
+            with ProjectStore(database) as store:
+                store.add_projects(fixtures.get_set_6(), employee='a')
+                self.assertEqual(store.summary('a'), processor.process_data(fixtures.get_set_6()))
+
+            with ProjectStore(database) as store:
+                summary = store.summary('a', rates)
+                self.assertEqual(summary.total, processor.evaluate_rate_scenarios(fixtures.get_set_6(), [rates])[0])
+                self.assertEqual(store.summary('a'), processor.process_data(fixtures.get_set_6()))
@@ -1,27 +1,144 @@
 import os
 import sys
 
+from contextlib import ExitStack
+from datetime import date
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-from . import processor
+from . import batch, parallel, processor
 
 
-def run(_filename: str) -> int:
+# Passing this instead of a filename reads the data from stdin.
+STDIN = '-'
+
+
+def parse_window(value: str) -> Tuple[date, date]:
     """
+    Parses a reporting window given as FROM:TO, e.g. `2024-07-01:2024-09-30`.
+
+    :param value:
+    :return: (first_day, last_day)
+    :raises ValueError: if it isn't two valid dates, in order
+    """
+    first_day, last_day = (processor.parse_date(day) for day in value.split(':'))
+    if last_day < first_day:
+        raise ValueError(f"The window ends before it starts: {value}")
+
+    return first_day, last_day
+
+
+# Options are passed as `--name value`, and their value is converted with the callable they map to.
+OPTIONS: Dict[str, Callable[[str], Any]] = {
+    '--jobs': int,
+    '--quarantine': str,
+    '--window': parse_window,
+    '--checkpoint': Path,
+}
+
+# Flags are passed as just `--name`, which sets them to True.
+FLAGS = ('--resume',)
+
+USAGE = (
+    "Usage: python -m wb_st_challenge [--jobs N] [--quarantine QUARANTINE_FILE] [--window FROM:TO] "
+    f"[--checkpoint CHECKPOINT_FILE [--resume]] <filename, or {STDIN} to read from stdin>"
+)
+
 
-    :param _filename:
+def run(
+    _filename: str, jobs: int = 1, quarantine: Optional[str] = None, window: Optional[Tuple[date, date]] = None
+) -> int:
+    """
+
+    :param _filename: A regular file, a named pipe, or STDIN
+    :param jobs: The number of processes to parse a regular file with
+    :param quarantine: If given, invalid rows are written to this file instead of aborting the run
+    :param window: If given, (first_day, last_day): only the days in this reporting window are reimbursed
     :return:
     """
-    data = processor.get_data_from_csv(Path(_filename))
-    result = processor.process_data(data)
+    with ExitStack() as stack:
+        rejected = None
+        if quarantine:
+            rejected = processor.Quarantine(stack.enter_context(open(quarantine, 'w', newline='')))
+
+        if _filename == STDIN:
+            data: Iterable[dict] = processor.get_data_from_stream(sys.stdin.buffer)
+            result = processor.process_data(data, quarantine=rejected, window=window)
+        elif Path(_filename).is_fifo():
+            data = processor.get_data_from_stream(stack.enter_context(open(_filename, 'rb')))
+            result = processor.process_data(data, quarantine=rejected, window=window)
+        elif jobs > 1 and rejected is None:
+            projects = parallel.parse_csv_in_parallel(Path(_filename), jobs)
+            if window is not None:
+                projects = processor.restrict_to_window(projects, window)
+            result = processor.process_projects(projects, window=window)
+        else:
+            data = processor.get_data_from_csv(Path(_filename))
+            result = processor.process_data(data, quarantine=rejected, window=window)
+
+    print_result(result)
+    if rejected is not None:
+        print(f'Quarantined Rows: {rejected.count}')
+    return 0
 
+
+def run_batch(
+    _filename: str, checkpoint: Path, resume: bool = False, window: Optional[Tuple[date, date]] = None
+) -> int:
+    """
+    Processes a multi-employee archive (see `batch.process_batch`), printing the total per employee, and then the
+    figures for all of them combined.
+
+    :param _filename: A regular file
+    :param checkpoint: Where to keep the checkpoint of this run
+    :param resume: Continue from the checkpoint, if there is one
+    :param window: If given, (first_day, last_day): only the days in this reporting window are reimbursed
+    :return:
+    """
+    results = batch.process_batch(Path(_filename), checkpoint=checkpoint, resume=resume, window=window)
+
+    for employee, result in results.items():
+        print(f'Employee {employee!r}: ${result.total:.2f}')
+    print_result(batch.combine_results(results))
+    return 0
+
+
+def print_result(result: processor.ReimbursementResult) -> None:
     print(f'Total: ${result.total:.2f}')
     print(f'High Cost Full Days: {result.high_cost_full_days}')
     print(f'High Cost Travel Days: {result.high_cost_travel_days}')
     print(f'Low Cost Full Days: {result.low_cost_full_days}')
     print(f'Low Cost Travel Days: {result.low_cost_travel_days}')
-    return 0
+    if result.removed_rows:
+        print(f'Removed Duplicate Rows: {result.removed_rows}')
+
+
+def parse_args(args: List[str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Splits the command line arguments (without the program name) into the filename and the options.
+
+    :param args:
+    :return: (filename, options), or None if the arguments aren't valid.
+    """
+    filenames = []
+    options = {}
+    remaining = iter(args)
+
+    for arg in remaining:
+        if arg in FLAGS:
+            options[arg[2:]] = True
+        elif arg in OPTIONS:
+            try:
+                options[arg[2:]] = OPTIONS[arg](next(remaining))
+            except (StopIteration, ValueError):
+                return None
+        else:
+            filenames.append(arg)
+
+    if len(filenames) != 1:
+        return None
+
+    return filenames[0], options
 
 
 def main(args: List[str]) -> int:
@@ -30,17 +147,30 @@ def main(args: List[str]) -> int:
     :param args:
     :return:
     """
-    if len(args) != 2:
-        print("Usage: python -m wb_st_challenge <filename>")
+    parsed = parse_args(args[1:])
+    if parsed is None:
+        print(USAGE)
         return 1
 
-    filename = args[1]
+    filename, options = parsed
 
-    if not (os.path.exists(filename) and os.path.isfile(filename)):
+    if filename != STDIN and not (os.path.exists(filename) and (os.path.isfile(filename) or Path(filename).is_fifo())):
         print(f"Error: File '{filename}' does not exist or else is not a file.")
         return 1
 
-    return run(filename)
+    if 'checkpoint' in options or 'resume' in options:
+        # Batch runs only support these options
+        if 'checkpoint' not in options or not options.keys() <= {'checkpoint', 'resume', 'window'}:
+            print(USAGE)
+            return 1
+
+        if filename == STDIN or not os.path.isfile(filename):
+            print(f"Error: '{filename}' must be a regular file to use a checkpoint.")
+            return 1
+
+        return run_batch(filename, **options)
+
+    return run(filename, **options)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,188 @@
+"""
+Batch runs over a multi-employee archive: a single CSV file with an `employee` column (see `store.EMPLOYEE_COLUMN`),
+in which the rows of each employee are grouped together, e.g. an export ordered by employee.
+
+Each employee is calculated with `processor.process_data` as soon as their last row has been read. Long runs can
+write checkpoints as they go. A checkpoint is a small JSON file holding the offset of the first row that hasn't been
+accounted for yet, plus the results of the employees completed so far. It's replaced atomically, so a run that's
+killed at any point can be resumed from its last checkpoint, with the same results as an uninterrupted run. The size
+and modification time of the input are recorded too, so that a checkpoint isn't applied to a file that has changed
+since.
+
+Usage:
+
+```
+from wb_st_challenge import batch
+
+results = batch.process_batch(Path('/path/to/archive.csv.gz'), checkpoint=Path('archive.checkpoint'), resume=True)
+```
+
+"""
+import csv
+import dataclasses
+import json
+import os
+import time
+
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, Final, List, Optional, Tuple
+
+from . import processor
+from .processor import ReimbursementResult
+from .store import DEFAULT_EMPLOYEE, EMPLOYEE_COLUMN
+
+
+CHECKPOINT_VERSION: Final = 1
+
+# How often (in seconds) a checkpoint is written, at most. It's only ever written between two employees.
+CHECKPOINT_INTERVAL: Final = 30.0
+
+
+@dataclass
+class Checkpoint:
+    input: str  # The resolved path of the input file
+    size: int  # The size of the input file, in bytes
+    mtime_ns: int  # The modification time of the input file
+    window: Optional[Tuple[date, date]]
+    offset: int  # Where the rows of the first employee that isn't completed yet start (in the decompressed input)
+    line: int  # The line number of the row at `offset`, minus one
+    results: Dict[str, ReimbursementResult]  # By employee, for the employees that are completed
+
+    def save(self, filename: Path) -> None:
+        """Writes the checkpoint to a temporary file first, then moves it into place, so it's never half-written."""
+        data = {
+            'version': CHECKPOINT_VERSION,
+            'input': self.input,
+            'size': self.size,
+            'mtime_ns': self.mtime_ns,
+            'window': [day.isoformat() for day in self.window] if self.window else None,
+            'offset': self.offset,
+            'line': self.line,
+            'results': {employee: dataclasses.astuple(result) for employee, result in self.results.items()},
+        }
+        temporary = filename.with_name(f'{filename.name}.tmp')
+        with open(temporary, 'w') as checkpoint_file:
+            json.dump(data, checkpoint_file, separators=(',', ':'))
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temporary, filename)
+
+    @classmethod
+    def load(cls, filename: Path) -> 'Checkpoint':
+        with open(filename) as checkpoint_file:
+            data = json.load(checkpoint_file)
+
+        if data.get('version') != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version in {filename}: {data.get('version')}")
+
+        window = None
+        if data['window']:
+            first_day, last_day = data['window']
+            window = (processor.parse_date(first_day), processor.parse_date(last_day))
+
+        return cls(
+            input=data['input'],
+            size=data['size'],
+            mtime_ns=data['mtime_ns'],
+            window=window,
+            offset=data['offset'],
+            line=data['line'],
+            results={employee: ReimbursementResult(*result) for employee, result in data['results'].items()},
+        )
+
+
+def process_batch(
+    filename: Path,
+    checkpoint: Optional[Path] = None,
+    resume: bool = False,
+    window: Optional[Tuple[date, date]] = None,
+    interval: float = CHECKPOINT_INTERVAL,
+) -> Dict[str, ReimbursementResult]:
+    """
+    Calculates the reimbursement for every employee in an archive file. Files compressed with gzip, bz2 or xz are
+    decompressed on the fly.
+
+    Note: rows are read line by line, so quoted values can't contain line breaks.
+
+    :param filename:
+    :param checkpoint: If given, a checkpoint is written here every `interval` seconds. It's removed once the whole
+     file has been processed.
+    :param resume: Continue from `checkpoint`, if it exists.
+    :param window: See `processor.process_data`.
+    :param interval:
+    :return: A ReimbursementResult per employee, in file order.
+    :raises ValueError: if the rows of an employee aren't grouped together, or if the checkpoint was written for a
+     different input file or window, or the input file has changed since.
+    """
+    stat = os.stat(filename)
+    state = Checkpoint(str(Path(filename).resolve()), stat.st_size, stat.st_mtime_ns, window, 0, 1, {})
+    if resume and checkpoint is not None and checkpoint.exists():
+        saved = Checkpoint.load(checkpoint)
+        if (saved.input, saved.window) != (state.input, state.window):
+            raise ValueError(f"The checkpoint in {checkpoint} is for {saved.input}, with window {saved.window}")
+        if (saved.size, saved.mtime_ns) != (state.size, state.mtime_ns):
+            raise ValueError(f"The checkpoint in {checkpoint} is for an earlier version of {saved.input}")
+        state = saved
+
+    results = state.results
+    last_saved = time.monotonic()
+
+    with open(filename, 'rb') as raw_file:
+        stream = processor.open_decompressed(raw_file)
+        fieldnames = next(csv.reader([stream.readline().decode()]), [])
+        if state.offset:
+            stream.seek(state.offset)
+        else:
+            state.offset = stream.tell()
+
+        line = state.line
+        employee = None
+        rows: List[dict] = []
+
+        while True:
+            position = stream.tell()
+            raw_line = stream.readline()
+            line += 1
+            row = None
+            if raw_line:
+                values = next(csv.reader([raw_line.decode()]), None)
+                if not values:
+                    continue  # A blank line, which DictReader would skip as well
+                row = dict(zip(fieldnames, values))
+
+            next_employee = (row.get(EMPLOYEE_COLUMN) or DEFAULT_EMPLOYEE) if row is not None else None
+            if rows and next_employee != employee:
+                assert employee is not None
+                results[employee] = processor.process_data(rows, window=window)
+                rows = []
+                state.offset, state.line = position, line - 1
+
+                if checkpoint is not None and time.monotonic() - last_saved >= interval:
+                    state.save(checkpoint)
+                    last_saved = time.monotonic()
+
+            if row is None:
+                break
+
+            if not rows and next_employee in results:
+                raise ValueError(f"Line {line}: the rows of employee {next_employee!r} aren't grouped together.")
+
+            employee = next_employee
+            rows.append(row)
+
+    if checkpoint is not None:
+        checkpoint.unlink(missing_ok=True)
+
+    return results
+
+
+def combine_results(results: Dict[str, ReimbursementResult]) -> ReimbursementResult:
+    """Adds up the results of several employees."""
+    combined = ReimbursementResult()
+    for result in results.values():
+        for field in dataclasses.fields(ReimbursementResult):
+            setattr(combined, field.name, getattr(combined, field.name) + getattr(result, field.name))
+
+    return combined
@@ -2,3 +2,6 @@ HIGH_COST_FULL_DAY_RATE = 85
 HIGH_COST_TRAVEL_DAY_RATE = 55
 LOW_COST_FULL_DAY_RATE = 75
 LOW_COST_TRAVEL_DAY_RATE = 45
+
+# Cost zones in code order, i.e. a zone's code is its index here.
+COST_ZONES = ('low', 'high')
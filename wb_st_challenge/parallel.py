@@ -0,0 +1,272 @@
+"""
+Helpers for spreading the work across several processes:
+
+- `process_many` runs many independent calculations. Parsed projects are packed into a single
+  `multiprocessing.shared_memory` block as fixed-width date ordinals and cost zone codes. Workers attach to that block
+  once and compute on views of it, so the only things that get pickled are (offset, count) pairs on the way in and
+  `ReimbursementResult`s on the way out.
+- `parse_csv_in_parallel` parses one large CSV file. The file is split into byte ranges that end on a newline, and
+  each worker parses its range into the same compact ordinal / zone code arrays.
+"""
+import csv
+import io
+import os
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Final, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from . import processor
+from .constants import COST_ZONES
+from .processor import ReimbursementResult
+
+
+_ORDINAL_TYPECODE: Final = 'i'
+_ZONE_TYPECODE: Final = 'I'  # Wide enough for any number of distinct cost zone strings
+# The columns that each worker reads, in this order
+_COLUMNS: Final = ('start_date', 'end_date', 'cost_zone')
+
+# Worker-side state, set up once per worker process by `_attach`.
+_shared: Optional[SharedMemory] = None
+_starts: Optional[memoryview] = None
+_ends: Optional[memoryview] = None
+_zones: Optional[memoryview] = None
+_zone_table: Tuple[str, ...] = COST_ZONES
+
+
+def encode_projects(projects: Iterable[tuple], zone_table: List[str]) -> Tuple[array, array, array]:
+    """
+    Encodes parsed projects as three parallel arrays: start ordinals, end ordinals and cost zone codes. Cost zones
+    that aren't in `zone_table` yet are appended to it.
+
+    :param projects: an iterable of (start_date, end_date, cost_zone) tuples
+    :param zone_table: the list of cost zones, indexed by code
+    :return: (starts, ends, zones)
+    """
+    starts = array(_ORDINAL_TYPECODE)
+    ends = array(_ORDINAL_TYPECODE)
+    zones = array(_ZONE_TYPECODE)
+    codes = {zone: code for code, zone in enumerate(zone_table)}
+
+    for start, end, cost_zone in projects:
+        if cost_zone not in codes:
+            codes[cost_zone] = len(zone_table)
+            zone_table.append(cost_zone)
+
+        starts.append(start.toordinal())
+        ends.append(end.toordinal())
+        zones.append(codes[cost_zone])
+
+    return starts, ends, zones
+
+
+def decode_projects(
+    starts: Sequence[int], ends: Sequence[int], zones: Sequence[int], zone_table: Sequence[str]
+) -> list:
+    """
+    The inverse of `encode_projects`.
+
+    :return: a list of (start_date, end_date, cost_zone) tuples
+    """
+    return [
+        (date.fromordinal(start), date.fromordinal(end), zone_table[zone])
+        for start, end, zone in zip(starts, ends, zones)
+    ]
+
+
+def process_many(datasets: Sequence[list], processes: Optional[int] = None) -> List[ReimbursementResult]:
+    """
+    Processes many independent sets of projects (e.g. one per employee) across a pool of worker processes.
+
+    :param datasets: A sequence of project lists, each in the format accepted by `processor.process_data`.
+    :param processes: The number of worker processes. Defaults to the number of CPUs.
+    :return: One ReimbursementResult per dataset, in the same order.
+    """
+    zone_table = list(COST_ZONES)
+    starts = array(_ORDINAL_TYPECODE)
+    ends = array(_ORDINAL_TYPECODE)
+    zones = array(_ZONE_TYPECODE)
+    offsets = []
+    counts = []
+
+    for data in datasets:
+        encoded = encode_projects(processor.parse_data_into_list_of_projects(data), zone_table)
+        offsets.append(len(starts))
+        counts.append(len(encoded[0]))
+        starts.extend(encoded[0])
+        ends.extend(encoded[1])
+        zones.extend(encoded[2])
+
+    if not starts:
+        return [ReimbursementResult() for _ in offsets]
+
+    processes = processes or os.cpu_count() or 1
+    ends_at, zones_at, size = _layout(len(starts))
+    shared = SharedMemory(create=True, size=size)
+    try:
+        buf = shared.buf
+        assert buf is not None
+        buf[:ends_at] = starts.tobytes()
+        buf[ends_at:zones_at] = ends.tobytes()
+        buf[zones_at:size] = zones.tobytes()
+
+        with ProcessPoolExecutor(
+            max_workers=processes, initializer=_attach, initargs=(shared.name, len(starts), tuple(zone_table))
+        ) as executor:
+            chunksize = max(1, len(offsets) // (processes * 4))
+            return list(executor.map(_process_slice, offsets, counts, chunksize=chunksize))
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+def _attach(name: str, length: int, zone_table: Tuple[str, ...]) -> None:
+    global _shared, _starts, _ends, _zones, _zone_table
+
+    _shared = SharedMemory(name=name)
+    ends_at, zones_at, size = _layout(length)
+    buf = _shared.buf
+    assert buf is not None
+    _starts = buf[:ends_at].cast(_ORDINAL_TYPECODE)
+    _ends = buf[ends_at:zones_at].cast(_ORDINAL_TYPECODE)
+    _zones = buf[zones_at:size].cast(_ZONE_TYPECODE)
+    _zone_table = zone_table
+
+
+def _layout(length: int) -> Tuple[int, int, int]:
+    """
+    Returns the byte offsets of the end ordinals and of the zone codes in a block holding `length` projects, and the
+    size of the block.
+    """
+    ordinal_bytes = length * array(_ORDINAL_TYPECODE).itemsize
+    return ordinal_bytes, 2 * ordinal_bytes, 2 * ordinal_bytes + length * array(_ZONE_TYPECODE).itemsize
+
+
+def _process_slice(offset: int, count: int) -> ReimbursementResult:
+    if count == 0:
+        return ReimbursementResult()
+
+    assert _starts is not None and _ends is not None and _zones is not None
+    end = offset + count
+    projects = decode_projects(_starts[offset:end], _ends[offset:end], _zones[offset:end], _zone_table)
+    return processor.process_projects(projects)
+
+
+class _ParsedRange(NamedTuple):
+    starts: array
+    ends: array
+    zones: array
+    zone_table: List[str]
+    line_count: int
+    error: Optional[Tuple[int, str]]  # (line number within the range, message)
+
+
+def parse_csv_in_parallel(filename: Path, jobs: int) -> list:
+    """
+    A parallel version of `processor.parse_data_into_list_of_projects(processor.get_data_from_csv(filename))`.
+
+    Note: rows are split on newlines, so quoted values can't contain line breaks. Compressed files can't be split up
+    at all, so those are parsed in this process instead.
+
+    :param filename:
+    :param jobs: The number of worker processes.
+    :return: A sorted list of (start_date, end_date, cost_zone) tuples.
+    :raises ValueError: for the first row (in file order) that can't be parsed, naming its line number.
+    """
+    with open(filename, 'rb') as csv_file:
+        if jobs <= 1 or processor.open_decompressed(csv_file) is not csv_file:
+            return _parse_serially(csv_file)
+
+        header = csv_file.readline()
+        fieldnames = next(csv.reader(io.TextIOWrapper(io.BytesIO(header), newline='')), [])
+        if not set(_COLUMNS).issubset(fieldnames):
+            # Every row is missing a column, so let the serial parser report the first one, with the same error
+            csv_file.seek(0)
+            return _parse_serially(csv_file)
+
+        columns = [fieldnames.index(name) for name in _COLUMNS]
+        ranges = _split_into_ranges(csv_file, csv_file.tell(), os.fstat(csv_file.fileno()).st_size, jobs)
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        parsed_ranges = list(
+            executor.map(_parse_range, [filename] * len(ranges), [columns] * len(ranges), *zip(*ranges))
+        )
+
+    projects: List[Tuple[int, int, str]] = []
+    first_line = 2  # Line 1 is the header
+    for parsed in parsed_ranges:
+        if parsed.error:
+            line, message = parsed.error
+            raise ValueError(f"Line {first_line + line}: {message}")
+
+        zone_table = parsed.zone_table
+        projects.extend(
+            (end, start, zone_table[zone]) for start, end, zone in zip(parsed.starts, parsed.ends, parsed.zones)
+        )
+        first_line += parsed.line_count
+
+    # Critical bit here: sorting by END date first, START date second, same as parse_data_into_list_of_projects.
+    projects.sort()
+    return [(date.fromordinal(start), date.fromordinal(end), cost_zone) for end, start, cost_zone in projects]
+
+
+def _parse_serially(csv_file: io.BufferedReader) -> list:
+    """Parses the whole file in this process, with the same errors as the workers."""
+    projects = []
+    for row in processor.get_data_from_stream(csv_file):
+        try:
+            projects.append(processor.parse_project(row))
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Line {row.line}: {e}") from e
+
+    return sorted(projects, key=processor.project_sort_key)
+
+
+def _split_into_ranges(csv_file: io.BufferedReader, begin: int, end: int, count: int) -> List[Tuple[int, int]]:
+    """Splits [begin, end) into about `count` byte ranges, each ending just after a newline (or at `end`)."""
+    boundaries = [begin]
+    for index in range(1, count):
+        csv_file.seek(max(begin + (end - begin) * index // count, boundaries[-1]))
+        if csv_file.tell() > begin:
+            csv_file.seek(csv_file.tell() - 1)
+            csv_file.readline()
+        boundaries.append(csv_file.tell())
+    boundaries.append(end)
+
+    return [(a, b) for a, b in zip(boundaries, boundaries[1:]) if a < b]
+
+
+def _parse_range(filename: Path, columns: List[int], begin: int, end: int) -> _ParsedRange:
+    with open(filename, 'rb') as csv_file:
+        csv_file.seek(begin)
+        data = csv_file.read(end - begin)
+
+    zone_table: List[str] = []
+    codes = {}
+    starts = array(_ORDINAL_TYPECODE)
+    ends = array(_ORDINAL_TYPECODE)
+    zones = array(_ZONE_TYPECODE)
+    error = None
+
+    reader = csv.reader(io.TextIOWrapper(io.BytesIO(data), newline=''))
+    try:
+        for row in reader:
+            if not row:
+                continue
+
+            start_date, end_date, cost_zone = (row[column] for column in columns)
+            cost_zone = cost_zone.lower()
+            if cost_zone not in codes:
+                codes[cost_zone] = len(zone_table)
+                zone_table.append(cost_zone)
+
+            starts.append(processor.parse_date(start_date).toordinal())
+            ends.append(processor.parse_date(end_date).toordinal())
+            zones.append(codes[cost_zone])
+    except (IndexError, ValueError) as e:
+        error = (reader.line_num - 1, str(e))
+
+    return _ParsedRange(starts, ends, zones, zone_table, data.count(b'\n'), error)
@@ -1,14 +1,38 @@
 """
 
 """
+import bisect
+import bz2
 import csv
-
-from dataclasses import dataclass
+import gzip
+import heapq
+import io
+import itertools
+import lzma
+
+from collections import Counter
+from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Callable, Dict, List, Tuple
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Final,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+    cast,
+)
 
 from .constants import (
+    COST_ZONES,
     HIGH_COST_FULL_DAY_RATE,
     HIGH_COST_TRAVEL_DAY_RATE,
     LOW_COST_FULL_DAY_RATE,
@@ -16,6 +40,35 @@ from .constants import (
 )
 
 
+# Leading "magic" bytes of the compressed formats we can read, and how to stream-decompress each of them.
+COMPRESSION_FORMATS: List[Tuple[bytes, Callable[[BinaryIO], io.BufferedIOBase]]] = [
+    (b'\x1f\x8b', lambda stream: gzip.GzipFile(fileobj=stream, mode='rb')),
+    (b'BZh', lambda stream: bz2.BZ2File(stream, mode='rb')),
+    (b'\xfd7zXZ\x00', lambda stream: lzma.LZMAFile(stream, mode='rb')),
+]
+MAGIC_LENGTH: Final = max(len(magic) for magic, _ in COMPRESSION_FORMATS)
+
+
+class RateTable(NamedTuple):
+    """The daily rates to reimburse at. Defaults to the rates in `constants`."""
+
+    high_cost_full_day: int = HIGH_COST_FULL_DAY_RATE
+    high_cost_travel_day: int = HIGH_COST_TRAVEL_DAY_RATE
+    low_cost_full_day: int = LOW_COST_FULL_DAY_RATE
+    low_cost_travel_day: int = LOW_COST_TRAVEL_DAY_RATE
+
+    def rate_for(self, cost_zone: str, is_travel_day: bool) -> int:
+        return (
+            # Disabling Black for this block, this is more readable
+            # fmt: off
+            self.high_cost_travel_day if cost_zone == "high" and is_travel_day else
+            self.low_cost_travel_day if cost_zone == "low" and is_travel_day else
+            self.high_cost_full_day if cost_zone == "high" else
+            self.low_cost_full_day
+            # fmt: on
+        )
+
+
 @dataclass
 class ReimbursementResult:
     total: int = 0
@@ -23,6 +76,44 @@ class ReimbursementResult:
     high_cost_travel_days: int = 0
     low_cost_full_days: int = 0
     low_cost_travel_days: int = 0
+    # The number of duplicate / redundant rows that were dropped before the calculation (see `normalise_data`). It
+    # describes the input rather than the reimbursement, so it isn't compared.
+    removed_rows: int = field(default=0, compare=False)
+
+
+@dataclass
+class TripResult:
+    """The reimbursement for a single trip: a run of consecutive days that are all covered by projects."""
+
+    start_date: date
+    end_date: date
+    result: ReimbursementResult
+
+
+class CSVRow(dict):
+    """A row read from a CSV file (see `get_data_from_stream`), which also knows the line number that it starts on."""
+
+    def __init__(self, line: int, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.line = line
+
+
+class Quarantine:
+    """
+    Collects the rows rejected by lenient parsing (see `parse_data_leniently`), writing each one to a CSV file as
+    soon as it's found, together with its line number and the reason it was rejected.
+    """
+
+    fieldnames = ['line', 'reason', 'start_date', 'end_date', 'cost_zone']
+
+    def __init__(self, csv_file: TextIO):
+        self.writer = csv.writer(csv_file)
+        self.writer.writerow(self.fieldnames)
+        self.count = 0
+
+    def add(self, line: int, reason: str, row: dict) -> None:
+        self.writer.writerow([line, reason, *(row.get(column) for column in self.fieldnames[2:])])
+        self.count += 1
 
 
 def parse_date(date_str: str) -> date:
@@ -30,19 +121,228 @@ def parse_date(date_str: str) -> date:
     return datetime.strptime(date_str, "%Y-%m-%d").date()
 
 
-def parse_data_into_list_of_projects(data: list) -> list:
+def normalise_data(data: Iterable[dict]) -> Tuple[list, int]:
+    """
+    Removes project rows that can't change the result, so that the rest of the pipeline only pays for distinct
+    projects. That's exact duplicates (compared on the raw strings, so before any parsing happens), and rows that are
+    fully contained in a sibling of the same cost zone that ends on the same day.
+
+    Careful: a contained row that ends EARLIER than its sibling can't be dropped! Since projects are sorted by end
+    date, it's merged first, and `merge_projects` keeps the start date of the first project in a sequence, so removing
+    it would change the result.
+
+    :param data: Iterable of project dictionaries with start_date, end_date, and cost_zone.
+    :return: A tuple of (remaining rows, number of rows removed)
+    """
+    count = 0
+    unique: Dict[Tuple[str, str, str], dict] = {}
+    for p in data:
+        unique.setdefault((p["start_date"], p["end_date"], p["cost_zone"]), p)
+        count += 1
+
+    # Group on the end date and (lower-cased) cost zone, and keep the row with the earliest start in each group.
+    groups: Dict[Tuple[str, str], List[dict]] = {}
+    for (_, end_date, cost_zone), p in unique.items():
+        groups.setdefault((end_date, cost_zone.lower()), []).append(p)
+
+    rows = [
+        group[0] if len(group) == 1 else min(group, key=lambda p: parse_date(p["start_date"]))
+        for group in groups.values()
+    ]
+    return rows, count - len(rows)
+
+
+def parse_data_into_list_of_projects(
+    data: Iterable[dict], presorted: bool = False, window: Optional[Tuple[date, date]] = None
+) -> list:
     """
 
     :param data:
+    :param presorted: Set this if `data` is already sorted by end date, then start date. The order is then verified
+     in a single pass (see `ensure_sorted`), rather than sorting all over again.
+    :param window: If given, only the projects that can affect a day in this (first_day, last_day) window are kept
+     (see `restrict_to_window`), before they're sorted.
     :return:
     """
-    projects = [(parse_date(p["start_date"]), parse_date(p["end_date"]), p["cost_zone"].lower()) for p in data]
+    return _order_projects(map(parse_project, data), presorted, window)
+
+
+def parse_project(p: dict) -> Tuple[date, date, str]:
+    """Parses a project dictionary into a (start_date, end_date, cost_zone) tuple."""
+    return parse_date(p["start_date"]), parse_date(p["end_date"]), p["cost_zone"].lower()
+
+
+def _order_projects(
+    projects: Iterable[Tuple[date, date, str]], presorted: bool, window: Optional[Tuple[date, date]]
+) -> list:
+    if presorted:
+        projects = ensure_sorted(projects)
+    if window is not None:
+        projects = restrict_to_window(list(projects), window)
+    if presorted:
+        return list(projects)
+
     # Critical bit here: sorting by END date first, START date second.
-    projects = sorted(projects, key=lambda p: (p[1], p[0], p[2]))
-    return projects
+    return sorted(projects, key=project_sort_key)
+
+
+def restrict_to_window(projects: Sequence[Tuple[date, date, str]], window: Tuple[date, date]) -> list:
+    """
+    Drops the projects that can't affect any day in `window`, keeping the order of the rest.
 
+    Days that no project covers split the projects into independent sequences: `merge_projects` never merges across
+    them, and a travel day only looks at the neighbouring sequence to see that there's a gap. So the projects of every
+    sequence that overlaps the window are kept in full (their first and last days are needed to tell the travel days
+    at the window's edges), and all the others are dropped. Dropping individual projects within a kept sequence
+    instead would change the result, since `merge_projects` depends on every one of them.
 
-def merge_projects(projects: list) -> list:
+    :param projects: a sequence of (start_date, end_date, cost_zone) tuples, in any order
+    :param window: (first_day, last_day), inclusive
+    :return: a list of the projects that are needed to calculate the days in `window`
+    """
+    first_day, last_day = (day.toordinal() for day in window)
+    earliest = latest = None
+    before = []  # (-end, start) of the projects that end before the window, so the latest ending one comes first
+    after = []  # (start, end) of the projects that start after the window, so the earliest starting one comes first
+
+    for start_date, end_date, _ in projects:
+        start, end = start_date.toordinal(), end_date.toordinal()
+        if end < first_day:
+            before.append((-end, start))
+        elif start > last_day:
+            after.append((start, end))
+        else:
+            earliest = start if earliest is None else min(earliest, start)
+            latest = end if latest is None else max(latest, end)
+
+    if earliest is None or latest is None:
+        return []
+
+    # Only the projects that lead up to the window without a gap belong to a sequence that overlaps it. Using heaps,
+    # this only costs time for the projects that are kept.
+    heapq.heapify(before)
+    while before and -before[0][0] >= earliest - 1:
+        earliest = min(earliest, heapq.heappop(before)[1])
+
+    heapq.heapify(after)
+    while after and after[0][0] <= latest + 1:
+        latest = max(latest, heapq.heappop(after)[1])
+
+    first, last = date.fromordinal(earliest), date.fromordinal(latest)
+    return [p for p in projects if first <= p[0] and p[1] <= last]
+
+
+def parse_data_leniently(
+    data: Iterable[dict],
+    quarantine: Quarantine,
+    presorted: bool = False,
+    window: Optional[Tuple[date, date]] = None,
+) -> list:
+    """
+    Like `parse_data_into_list_of_projects`, but rows that aren't valid (see `validate_project`) are set aside in the
+    quarantine, instead of bringing the whole run to a halt.
+
+    Rows read by `get_data_from_stream` / `get_data_from_csv` are quarantined with the line they start on in the file.
+    Other dictionaries are numbered as if they came from a CSV file with a header row and one project per line, i.e.
+    the first project is on line 2.
+
+    :param data:
+    :param quarantine:
+    :param presorted: See `parse_data_into_list_of_projects`.
+    :param window: See `parse_data_into_list_of_projects`.
+    :return:
+    """
+    projects = []
+    for position, p in enumerate(data, start=2):
+        try:
+            projects.append(validate_project(p))
+        except ValueError as e:
+            quarantine.add(getattr(p, 'line', position), str(e), p)
+
+    return _order_projects(projects, presorted, window)
+
+
+def validate_project(p: dict) -> Tuple[date, date, str]:
+    """
+    Parses a project dictionary, checking that both dates are valid, that it doesn't end before it starts, and that
+    the cost zone is one of `constants.COST_ZONES`.
+
+    :param p: A project dictionary with start_date, end_date, and cost_zone.
+    :return: A (start_date, end_date, cost_zone) tuple
+    :raises ValueError: with the reason the project isn't valid
+    """
+    for column in ('start_date', 'end_date', 'cost_zone'):
+        if not p.get(column):
+            raise ValueError(f"Missing {column}")
+
+    try:
+        start = parse_date(p["start_date"])
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid start_date: {e}") from e
+
+    try:
+        end = parse_date(p["end_date"])
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid end_date: {e}") from e
+
+    if end < start:
+        raise ValueError("end_date is before start_date")
+
+    if not isinstance(p["cost_zone"], str):
+        raise ValueError(f"Invalid cost_zone: {p['cost_zone']!r}")
+
+    cost_zone = p["cost_zone"].lower()
+    if cost_zone not in COST_ZONES:
+        raise ValueError(f"Unknown cost_zone: {p['cost_zone']!r}")
+
+    return start, end, cost_zone
+
+
+def ensure_sorted(projects: Iterable[Tuple[date, date, str]]) -> Iterator[Tuple[date, date, str]]:
+    """
+    Passes through projects that are already sorted by end date, then start date, verifying that order as it goes.
+    Runs of projects with the same dates are put in cost zone order, so that the result matches `project_sort_key`
+    exactly, without upstream systems having to care about that last bit.
+
+    :param projects: an iterable of (start_date, end_date, cost_zone) tuples
+    :return: the same projects, in `project_sort_key` order
+    :raises ValueError: as soon as a project is out of order. The message names the project by its dates rather than
+     its position, since callers like `process_data` may have dropped rows before the projects get here.
+    """
+    run: List[Tuple[date, date, str]] = []
+    for project in projects:
+        if run and (project[1], project[0]) != (run[0][1], run[0][0]):
+            if (project[1], project[0]) < (run[0][1], run[0][0]):
+                raise ValueError(
+                    f"Project {project[0]} - {project[1]} ({project[2]}) is out of order: it comes after "
+                    f"{run[0][0]} - {run[0][1]}, but projects must be sorted by end date, then start date."
+                )
+            yield from sorted(run, key=project_sort_key)
+            run = []
+        run.append(project)
+
+    yield from sorted(run, key=project_sort_key)
+
+
+def merge_sorted_sources(sources: Iterable[Iterable[dict]]) -> Iterator[Tuple[date, date, str]]:
+    """
+    Combines several sources of project dictionaries, each already sorted by end date, then start date, into one
+    stream of parsed projects in `project_sort_key` order. Every source is parsed and merged lazily (see
+    `ensure_sorted`), so time and memory stay linear in the number of projects.
+
+    :param sources: Iterables of project dictionaries with start_date, end_date, and cost_zone.
+    :return: an iterator of (start_date, end_date, cost_zone) tuples
+    """
+    parsed_sources = [ensure_sorted(map(parse_project, data)) for data in sources]
+    return heapq.merge(*parsed_sources, key=project_sort_key)
+
+
+def project_sort_key(project: Tuple[date, date, str]) -> Tuple[date, date, str]:
+    """The order that projects need to be in for `merge_projects`: by END date first, START date second."""
+    return project[1], project[0], project[2]
+
+
+def merge_projects(projects: Iterable[Tuple[date, date, str]]) -> list:
     """
     Merges projects that have contiguous or overlapping dates, but only if the cost zone is the same. Kind of a
     messy-looking algorithm! Basically it manages a list (`merged`) of projects, and as it iterates over the list of
@@ -83,7 +383,12 @@ def merge_projects(projects: list) -> list:
     return merged
 
 
-def process_data(data: list) -> ReimbursementResult:
+def process_data(
+    data: Iterable[dict],
+    presorted: bool = False,
+    quarantine: Optional[Quarantine] = None,
+    window: Optional[Tuple[date, date]] = None,
+) -> ReimbursementResult:
     """
     Processes a list of projects and calculates reimbursement totals.
 
@@ -95,24 +400,131 @@ def process_data(data: list) -> ReimbursementResult:
             ]
         )
 
-    :param data: List of project dictionaries with start_date, end_date, and cost_zone.
-    :return: A ReimbursementResult containing the total reimbursement and categorized day counts.
+    :param data: List (or any iterable, e.g. `get_data_from_stream`) of project dictionaries with start_date,
+     end_date, and cost_zone.
+    :param presorted: Set this if `data` is already sorted by end date, then start date, to skip sorting it again.
+    :param quarantine: If given, invalid rows are set aside in it rather than raising (see `parse_data_leniently`).
+    :param window: If given, only the days from window[0] to window[1] (inclusive) are reimbursed, exactly as they
+     would be in a calculation over all of `data`. Projects that can't affect those days are dropped right after
+     parsing, so the cost of the calculation depends on the size of the window rather than the whole history.
+    :return: A ReimbursementResult containing the total reimbursement and categorized day counts, and the number of
+     duplicate / redundant rows that were dropped (see `normalise_data`).
     """
     if not data:
         return ReimbursementResult()
 
-    projects = parse_data_into_list_of_projects(data)
+    if quarantine is not None:
+        # No normalising here, as that would throw off the line numbers. It doesn't change the result anyway.
+        return process_projects(parse_data_leniently(data, quarantine, presorted, window), window=window)
+
+    data, removed_rows = normalise_data(data)
+    projects = parse_data_into_list_of_projects(data, presorted=presorted, window=window)
+    result = process_projects(projects, window=window)
+    result.removed_rows = removed_rows
+    return result
+
+
+def process_sorted_sources(sources: Iterable[Iterable[dict]]) -> ReimbursementResult:
+    """
+    Processes projects from several sources (e.g. files), each of which is already sorted by end date, then start
+    date. The sources are combined with a streaming merge (see `merge_sorted_sources`), so nothing is sorted again.
+
+    :param sources: Iterables of project dictionaries with start_date, end_date, and cost_zone.
+    :return: A ReimbursementResult containing the total reimbursement and categorized day counts.
+    """
+    return process_projects(merge_sorted_sources(sources))
+
+
+def process_columns(start_dates: Sequence, end_dates: Sequence, cost_zones: Sequence) -> ReimbursementResult:
+    """
+    Like `process_data`, but for data that's already held in columns (database cursors, DataFrames, Arrow batches),
+    so there's no need to build a dict per row, or to format dates as strings only to parse them again.
+
+    Example:
+        process_columns(
+            [date(2024, 8, 30), date(2024, 9, 5)],
+            array('i', [date(2024, 9, 5).toordinal(), date(2024, 9, 8).toordinal()]),
+            ['high', 'low'],
+        )
+
+    :param start_dates: date objects, date ordinals, or YYYY-MM-DD strings. The first value decides for the column.
+    :param end_dates: Same as start_dates.
+    :param cost_zones: Cost zone strings, or cost zone codes (an index into `constants.COST_ZONES`).
+    :return: A ReimbursementResult containing the total reimbursement and categorized day counts.
+    :raises ValueError: if the columns aren't all the same length, or for a cost zone code that isn't an index into
+     `constants.COST_ZONES` (negative codes included).
+    """
+    if not len(start_dates) == len(end_dates) == len(cost_zones):
+        raise ValueError("All columns must have the same length.")
+
+    projects = zip(_column_to_dates(start_dates), _column_to_dates(end_dates), _column_to_cost_zones(cost_zones))
+    return process_projects(sorted(projects, key=project_sort_key))
+
+
+def _column_to_dates(column: Sequence) -> Iterable[date]:
+    if not len(column):
+        return []
+    if isinstance(column[0], datetime):
+        return (value.date() for value in column)
+    if isinstance(column[0], date):
+        return column
+    if isinstance(column[0], str):
+        return map(parse_date, column)
+    return map(date.fromordinal, column)
+
+
+def _column_to_cost_zones(column: Sequence) -> Iterable[str]:
+    if len(column) and isinstance(column[0], str):
+        return (cost_zone.lower() for cost_zone in column)
+    return map(_cost_zone_for_code, column)
+
+
+def _cost_zone_for_code(code: int) -> str:
+    if not 0 <= code < len(COST_ZONES):
+        raise ValueError(f"Unknown cost zone code: {code}")
+    return COST_ZONES[code]
+
+
+def process_projects(
+    projects: Iterable[Tuple[date, date, str]], window: Optional[Tuple[date, date]] = None
+) -> ReimbursementResult:
+    """
+    Calculates reimbursement totals for projects that have already been parsed and sorted, i.e. the output of
+    `parse_data_into_list_of_projects`.
+
+    :param projects: a sorted list (or iterator) of (start_date, end_date, cost_zone) tuples
+    :param window: If given, only the days from window[0] to window[1] (inclusive) are reimbursed.
+    :return: A ReimbursementResult containing the total reimbursement and categorized day counts.
+    """
     merged = merge_projects(projects)
-    daily_rates = calculate_daily_rates(merged)
+    daily_rates = calculate_daily_rates(merged, window=window)
     return calculate_reimbursement_result(daily_rates)
 
 
-def calculate_daily_rates(merged: list) -> dict:
+def process_trips(data: Iterable[dict]) -> List[TripResult]:
+    """
+    Like `process_data`, but breaks the reimbursement down per trip (see `calculate_trips`). The results of all the
+    trips add up to the result of `process_data`.
+
+    :param data: List of project dictionaries with start_date, end_date, and cost_zone.
+    :return: A TripResult per trip, in date order.
+    """
+    data, _ = normalise_data(data)
+    merged = merge_projects(parse_data_into_list_of_projects(data))
+    return calculate_trips(merged)
+
+
+def calculate_daily_rates(
+    merged: list, rates: RateTable = RateTable(), window: Optional[Tuple[date, date]] = None
+) -> dict:
     """
     Calculates daily rates for the merged project list. Fair warning, this algorithm is a little verbose, but
     it properly calculates things and has deep testing on it, so we can refactor and optimize it later if needed.
 
     :param merged: List of merged projects
+    :param rates: The daily rates to use
+    :param window: If given, (first_day, last_day): only the days in between (inclusive) are calculated. Travel days
+     are still decided by the full merged projects.
     :return: Dictionary of daily rates {date: (rate, cost_zone, is_travel_day)}
     """
     daily_rates: Dict[date, Tuple[int, str, bool]] = {}  # { date: (rate, cost_zone, is_travel_day) }
@@ -121,36 +533,77 @@ def calculate_daily_rates(merged: list) -> dict:
         current = start
         is_travel_day_tester: Callable[[date], bool] = make_is_travel_day_tester(merged, index, start, end)
 
-        while current <= end:
+        last = end
+        if window is not None:
+            current = max(start, window[0])
+            last = min(end, window[1])
+
+        while current <= last:
             is_travel_day = is_travel_day_tester(current)
 
-            rate = (
-                # Disabling Black for this block, this is more readable
-                # fmt: off
-                HIGH_COST_TRAVEL_DAY_RATE if cost_zone == "high" and is_travel_day else
-                LOW_COST_TRAVEL_DAY_RATE if cost_zone == "low" and is_travel_day else
-                HIGH_COST_FULL_DAY_RATE if cost_zone == "high" else
-                LOW_COST_FULL_DAY_RATE
-                # fmt: on
-            )
+            claim = (rates.rate_for(cost_zone, is_travel_day), cost_zone, is_travel_day)
 
-            if current in daily_rates:
-                existing_rate, existing_cost_zone, existing_is_travel = daily_rates[current]
+            if current not in daily_rates or _takes_over(daily_rates[current], claim):
+                daily_rates[current] = claim
 
-                # Ensure high-cost is prioritized over low-cost
-                if cost_zone == "high" and existing_cost_zone == "low":
-                    daily_rates[current] = (rate, cost_zone, is_travel_day)
+            current += timedelta(days=1)
 
-                # Keep the highest rate, prioritizing full days over travel days
-                elif rate > existing_rate or (rate == existing_rate and not is_travel_day):
-                    daily_rates[current] = (rate, cost_zone, is_travel_day)
+    return daily_rates
 
-            else:
-                daily_rates[current] = (rate, cost_zone, is_travel_day)
 
-            current += timedelta(days=1)
+def _takes_over(existing: Tuple[int, str, bool], claim: Tuple[int, str, bool]) -> bool:
+    """Whether a later project's claim on a day replaces the existing one. Both are (rate, cost_zone, is_travel_day)."""
+    existing_rate, existing_cost_zone, _ = existing
+    rate, cost_zone, is_travel_day = claim
+    return (
+        # Ensure high-cost is prioritized over low-cost
+        (cost_zone == "high" and existing_cost_zone == "low")
+        # Keep the highest rate, prioritizing full days over travel days
+        or rate > existing_rate
+        or (rate == existing_rate and not is_travel_day)
+    )
 
-    return daily_rates
+
+def evaluate_rate_scenarios(data: Iterable[dict], scenarios: Sequence[Sequence[int]]) -> List[int]:
+    """
+    Calculates the reimbursement total under each of many candidate rate tables, for "what-if" modelling. The
+    projects are parsed, sorted and merged only once, and each day is classified (cost zone / travel day) only once,
+    after which each scenario's total is just the product of the day counts and its rates.
+
+    Note that which project "wins" a day claimed by several of them depends on how the rates compare with each other
+    (see `calculate_daily_rates`). So the days are classified once per distinct ranking of the four rates, which is
+    normally just once for all scenarios.
+
+    :param data: List of project dictionaries with start_date, end_date, and cost_zone.
+    :param scenarios: RateTables, or anything with the four rates in RateTable order.
+    :return: The total reimbursement for each scenario, in the same order.
+    :raises ValueError: for a scenario that doesn't have exactly four rates.
+    """
+    for scenario in scenarios:
+        if len(scenario) != len(RateTable._fields):
+            raise ValueError(f"A scenario needs {len(RateTable._fields)} rates, got {len(scenario)}: {scenario!r}")
+    rate_tables = [RateTable(*scenario) for scenario in scenarios]
+
+    data, _ = normalise_data(data)
+    merged = merge_projects(parse_data_into_list_of_projects(data))
+
+    # { ranking of the rates: { (cost_zone, is_travel_day): number of days } }
+    day_counts: Dict[Tuple[int, ...], Counter] = {}
+    for rates in rate_tables:
+        ranking = _rank_rates(rates)
+        if ranking not in day_counts:
+            daily_rates = calculate_daily_rates(merged, rates)
+            day_counts[ranking] = Counter((cost_zone, is_travel) for _, cost_zone, is_travel in daily_rates.values())
+
+    return [
+        sum(count * rates.rate_for(*day_type) for day_type, count in day_counts[_rank_rates(rates)].items())
+        for rates in rate_tables
+    ]
+
+
+def _rank_rates(rates: RateTable) -> Tuple[int, ...]:
+    """Returns how each pair of rates compares (-1, 0 or 1), which is all that `calculate_daily_rates` looks at."""
+    return tuple((a > b) - (a < b) for a, b in itertools.combinations(rates, 2))
 
 
 def make_is_travel_day_tester(merged: list, index: int, start: datetime, end: datetime) -> Callable:
@@ -206,12 +659,206 @@ def calculate_reimbursement_result(daily_rates: dict) -> ReimbursementResult:
     return reimbursement
 
 
+def calculate_trips(merged: list, rates: RateTable = RateTable()) -> List[TripResult]:
+    """
+    Calculates the same figures as `calculate_daily_rates` + `calculate_reimbursement_result`, but per trip, and
+    without going through the days one by one.
+
+    A trip is a run of days that are all covered by merged projects, so trips are separated by days that no project
+    covers. Within a trip, the days are split into segments at the first day, the second day, the last day and the
+    day after the last day of every project. In a segment, each project either covers every day or none of them, and
+    only a first or last day can be a travel day, so every day of a segment is settled in the same way. Which claim
+    wins is worked out once per segment instead of once per day, in the same order as `calculate_daily_rates`.
+
+    :param merged: List of merged projects
+    :param rates: The daily rates to use
+    :return: A TripResult per trip, in date order.
+    """
+    one_day = timedelta(days=1)
+    # Projects that end before they start don't cover any days
+    by_start = sorted((index for index, p in enumerate(merged) if p[0] <= p[1]), key=lambda index: merged[index][0])
+
+    trips: List[TripResult] = []
+    trip: List[int] = []
+    trip_end = date.min
+    for index in by_start:
+        start, end, _ = merged[index]
+        if trip and start > trip_end + one_day:
+            trips.append(_calculate_trip(merged, trip, rates))
+            trip = []
+
+        trip_end = max(trip_end, end) if trip else end
+        trip.append(index)
+
+    if trip:
+        trips.append(_calculate_trip(merged, trip, rates))
+
+    return trips
+
+
+def _calculate_trip(merged: list, trip: List[int], rates: RateTable) -> TripResult:
+    """Calculates one trip for `calculate_trips`. `trip` holds the indexes of its projects, ordered by start date."""
+    one_day = timedelta(days=1)
+    boundaries = sorted(
+        {
+            day
+            for index in trip
+            for day in (merged[index][0], merged[index][0] + one_day, merged[index][1], merged[index][1] + one_day)
+        }
+    )
+    is_travel_day_testers = {index: make_is_travel_day_tester(merged, index, *merged[index][:2]) for index in trip}
+
+    result = ReimbursementResult()
+    active: List[int] = []  # The projects that cover the current segment, in the order they're processed
+    upcoming = iter(trip)
+    next_index = next(upcoming, None)
+
+    for first_day, after_last_day in zip(boundaries, boundaries[1:]):
+        active = [index for index in active if merged[index][1] >= first_day]
+        while next_index is not None and merged[next_index][0] <= first_day:
+            bisect.insort(active, next_index)
+            next_index = next(upcoming, None)
+
+        winner: Optional[Tuple[int, str, bool]] = None
+        for index in active:
+            cost_zone = merged[index][2]
+            is_travel_day = is_travel_day_testers[index](first_day)
+            claim = (rates.rate_for(cost_zone, is_travel_day), cost_zone, is_travel_day)
+            if winner is None or _takes_over(winner, claim):
+                winner = claim
+
+        assert winner is not None  # Every day of a trip is covered by at least one project
+        days = (after_last_day - first_day).days
+        rate, cost_zone, is_travel_day = winner
+        result.total += rate * days
+        if cost_zone == "high":
+            if is_travel_day:
+                result.high_cost_travel_days += days
+            else:
+                result.high_cost_full_days += days
+        else:
+            if is_travel_day:
+                result.low_cost_travel_days += days
+            else:
+                result.low_cost_full_days += days
+
+    return TripResult(boundaries[0], boundaries[-1] - one_day, result)
+
+
 def get_data_from_csv(filename: Path) -> list:
     """
+    Reads all rows of a CSV file. Files compressed with gzip, bz2 or xz are decompressed on the fly.
 
     :param filename:
     :return:
     """
-    with open(filename, 'r', newline='') as csv_file:
-        reader = csv.DictReader(csv_file)
-        return list(reader)
+    with open(filename, 'rb') as csv_file:
+        return list(get_data_from_stream(csv_file))
+
+
+def get_data_from_stream(stream: BinaryIO) -> Iterator[CSVRow]:
+    """
+    Reads CSV rows from a binary stream, e.g. `sys.stdin.buffer` or a named pipe, yielding each row as soon as it has
+    arrived rather than waiting for the whole input. The stream is read in chunks and is left open. Compressed
+    streams (see COMPRESSION_FORMATS) are detected by their leading bytes and decompressed on the fly.
+
+    The rows are the same dictionaries that `csv.DictReader` returns, but they also carry the line number that they
+    start on (see `CSVRow`), counting blank lines and line breaks in quoted values.
+
+    :param stream:
+    :return:
+    """
+    decompressed = open_decompressed(stream)
+    text = io.TextIOWrapper(cast(BinaryIO, decompressed), newline='')
+    try:
+        reader = csv.reader(text)
+        fieldnames = next(reader, None)
+        while fieldnames is not None:
+            line = reader.line_num + 1
+            values = next(reader, None)
+            if values is None:
+                break
+            if values:  # Blank lines are skipped, same as csv.DictReader does
+                yield _to_csv_row(line, fieldnames, values)
+    finally:
+        # The caller may already have closed the stream, if it stopped reading (e.g. on a parse error) early on.
+        if not stream.closed:
+            text.detach()
+            if decompressed is not stream:
+                decompressed.close()
+
+
+def _to_csv_row(line: int, fieldnames: List[str], values: List[str]) -> CSVRow:
+    """Pairs up the values with the fieldnames, the way `csv.DictReader` does (with its default restkey / restval)."""
+    row = CSVRow(line, zip(fieldnames, values))
+    width, length = len(fieldnames), len(values)
+    if length > width:
+        row[None] = values[width:]
+    else:
+        row.update(dict.fromkeys(fieldnames[length:]))
+    return row
+
+
+def open_decompressed(stream: BinaryIO) -> Union[BinaryIO, io.BufferedIOBase]:
+    """
+    Returns a streaming decompressor for `stream` if it starts with the magic bytes of one of the COMPRESSION_FORMATS,
+    otherwise `stream` itself. Closing the decompressor leaves `stream` open.
+
+    A pipe may not have delivered all the magic bytes yet, in which case `peek` returns fewer of them. They're read
+    then, and the stream is wrapped in a reader that hands them back out first.
+
+    :param stream: A binary stream, e.g. a file, stdin or a pipe.
+    :return:
+    """
+    head = b''
+    if stream.seekable():
+        position = stream.tell()
+        head = stream.read(MAGIC_LENGTH)
+        stream.seek(position)
+    elif hasattr(stream, 'peek'):
+        head = stream.peek(MAGIC_LENGTH)
+
+    if len(head) < MAGIC_LENGTH and not stream.seekable():
+        head = _read_at_most(stream, MAGIC_LENGTH)
+        stream = cast(BinaryIO, io.BufferedReader(_Replay(head, stream)))
+
+    for magic, decompressor in COMPRESSION_FORMATS:
+        if head.startswith(magic):
+            return decompressor(stream)
+
+    return stream
+
+
+def _read_at_most(stream: BinaryIO, size: int) -> bytes:
+    """Reads until there are `size` bytes, or the stream ends, whichever comes first."""
+    data = b''
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+class _Replay(io.RawIOBase):
+    """A raw stream that returns `prefix` first, and then reads on from `stream` (which it leaves open)."""
+
+    def __init__(self, prefix: bytes, stream: BinaryIO):
+        super().__init__()
+        self.prefix = prefix
+        self.stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.prefix:
+            size = min(len(buffer), len(self.prefix))
+            buffer[:size] = self.prefix[:size]
+            self.prefix = self.prefix[size:]
+            return size
+
+        data = self.stream.read1(len(buffer)) if hasattr(self.stream, 'read1') else self.stream.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        return size
@@ -0,0 +1,282 @@
+"""
+A SQLite-backed project store. Projects are kept per employee, with dates stored as ordinals, and the merge /
+travel-day / daily-rate pipeline from `processor` is re-expressed in SQL (window functions plus recursive CTEs), so
+that only the summary for an employee ever comes back into Python.
+
+Usage:
+
+```
+from wb_st_challenge.store import ProjectStore
+
+with ProjectStore('/path/to/projects.sqlite3') as store:
+    store.load_csv(Path('/path/to/data_file.csv'))
+    result = store.summary('jane.doe')
+```
+
+"""
+import csv
+import sqlite3
+
+from pathlib import Path
+from typing import Iterable, List, Union
+
+from .processor import RateTable, ReimbursementResult, parse_date
+
+
+# Optional CSV column holding the employee a project belongs to. Data without it is stored under DEFAULT_EMPLOYEE.
+EMPLOYEE_COLUMN = 'employee'
+DEFAULT_EMPLOYEE = ''
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    employee TEXT NOT NULL,
+    start_date INTEGER NOT NULL,
+    end_date INTEGER NOT NULL,
+    cost_zone TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_employee_end_start ON projects (employee, end_date, start_date);
+
+-- Summaries are cached per employee AND per rate table, so a change of rates never returns stale figures.
+CREATE TABLE IF NOT EXISTS rate_summaries (
+    employee TEXT NOT NULL,
+    high_cost_full_day INTEGER NOT NULL,
+    high_cost_travel_day INTEGER NOT NULL,
+    low_cost_full_day INTEGER NOT NULL,
+    low_cost_travel_day INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    high_cost_full_days INTEGER NOT NULL,
+    high_cost_travel_days INTEGER NOT NULL,
+    low_cost_full_days INTEGER NOT NULL,
+    low_cost_travel_days INTEGER NOT NULL,
+    PRIMARY KEY (employee, high_cost_full_day, high_cost_travel_day, low_cost_full_day, low_cost_travel_day)
+);
+
+CREATE TEMP TABLE IF NOT EXISTS ordered (
+    seq INTEGER PRIMARY KEY,
+    start_date INTEGER NOT NULL,
+    end_date INTEGER NOT NULL,
+    cost_zone TEXT NOT NULL
+);
+CREATE TEMP TABLE IF NOT EXISTS merged (
+    grp INTEGER PRIMARY KEY,
+    start_date INTEGER NOT NULL,
+    end_date INTEGER NOT NULL,
+    cost_zone TEXT NOT NULL
+);
+CREATE TEMP TABLE IF NOT EXISTS candidates (
+    day INTEGER NOT NULL,
+    k INTEGER NOT NULL,
+    rate INTEGER NOT NULL,
+    cost_zone TEXT NOT NULL,
+    is_travel INTEGER NOT NULL,
+    PRIMARY KEY (day, k)
+);
+"""
+
+# Same ordering as `processor.parse_data_into_list_of_projects`: END date first, START date second.
+_ORDER_PROJECTS = """
+INSERT INTO ordered (seq, start_date, end_date, cost_zone)
+SELECT ROW_NUMBER() OVER (ORDER BY end_date, start_date, cost_zone), start_date, end_date, cost_zone
+FROM projects
+WHERE employee = ?
+"""
+
+# A step-by-step replay of `processor.merge_projects`. Each row either extends / is swallowed by the most recent
+# merged entry (same `grp`), or starts a new one (`grp + 1`).
+_JOINS_LAST_ENTRY = """(
+    w.end_date >= o.start_date - 1
+    AND (w.cost_zone = o.cost_zone OR (o.start_date >= w.start_date AND o.end_date <= w.end_date))
+)"""
+_MERGE_PROJECTS = f"""
+INSERT INTO merged (grp, start_date, end_date, cost_zone)
+WITH RECURSIVE walk (seq, grp, start_date, end_date, cost_zone) AS (
+    SELECT seq, 1, start_date, end_date, cost_zone FROM ordered WHERE seq = 1
+    UNION ALL
+    SELECT
+        o.seq,
+        CASE WHEN {_JOINS_LAST_ENTRY} THEN w.grp ELSE w.grp + 1 END,
+        CASE WHEN {_JOINS_LAST_ENTRY} THEN w.start_date ELSE o.start_date END,
+        CASE WHEN {_JOINS_LAST_ENTRY} THEN MAX(w.end_date, o.end_date) ELSE o.end_date END,
+        CASE WHEN {_JOINS_LAST_ENTRY} THEN w.cost_zone ELSE o.cost_zone END
+    FROM walk w JOIN ordered o ON o.seq = w.seq + 1
+)
+SELECT grp, start_date, MAX(end_date), cost_zone FROM walk GROUP BY grp
+"""
+
+# Expands every merged entry into its days, flagging the travel days the same way `make_is_travel_day_tester`
+# does (by looking at the neighbouring entries), and numbering the candidates for each day in merged order.
+_EXPAND_DAYS = """
+INSERT INTO candidates (day, k, rate, cost_zone, is_travel)
+WITH RECURSIVE flagged AS (
+    SELECT
+        grp,
+        start_date,
+        end_date,
+        cost_zone,
+        COALESCE(LAG(end_date) OVER w < start_date - 1, 1) AS travel_start,
+        COALESCE(LEAD(start_date) OVER w > end_date + 1, 1) AS travel_end
+    FROM merged
+    WINDOW w AS (ORDER BY grp)
+),
+days (grp, day, start_date, end_date, cost_zone, travel_start, travel_end) AS (
+    SELECT grp, start_date, start_date, end_date, cost_zone, travel_start, travel_end FROM flagged
+    UNION ALL
+    SELECT grp, day + 1, start_date, end_date, cost_zone, travel_start, travel_end FROM days WHERE day < end_date
+),
+classified AS (
+    SELECT
+        grp,
+        day,
+        cost_zone,
+        (day = start_date AND travel_start) OR (day = end_date AND travel_end) AS is_travel
+    FROM days
+)
+SELECT
+    day,
+    ROW_NUMBER() OVER (PARTITION BY day ORDER BY grp),
+    CASE
+        WHEN cost_zone = 'high' AND is_travel THEN :high_cost_travel
+        WHEN cost_zone = 'low' AND is_travel THEN :low_cost_travel
+        WHEN cost_zone = 'high' THEN :high_cost_full
+        ELSE :low_cost_full
+    END,
+    cost_zone,
+    is_travel
+FROM classified
+"""
+
+# Folds the candidates for each day in merged order, using the same precedence rules as `calculate_daily_rates`,
+# and rolls the winners up into the figures of a `ReimbursementResult`.
+_REPLACES = """(
+    (c.cost_zone = 'high' AND f.cost_zone = 'low') OR c.rate > f.rate OR (c.rate = f.rate AND NOT c.is_travel)
+)"""
+_SUMMARISE = f"""
+WITH RECURSIVE fold (day, k, rate, cost_zone, is_travel) AS (
+    SELECT day, k, rate, cost_zone, is_travel FROM candidates WHERE k = 1
+    UNION ALL
+    SELECT
+        c.day,
+        c.k,
+        CASE WHEN {_REPLACES} THEN c.rate ELSE f.rate END,
+        CASE WHEN {_REPLACES} THEN c.cost_zone ELSE f.cost_zone END,
+        CASE WHEN {_REPLACES} THEN c.is_travel ELSE f.is_travel END
+    FROM fold f JOIN candidates c ON c.day = f.day AND c.k = f.k + 1
+),
+winners AS (
+    SELECT f.* FROM fold f JOIN (SELECT day, MAX(k) AS k FROM candidates GROUP BY day) last USING (day, k)
+)
+SELECT
+    COALESCE(SUM(rate), 0),
+    COALESCE(SUM(cost_zone = 'high' AND NOT is_travel), 0),
+    COALESCE(SUM(cost_zone = 'high' AND is_travel), 0),
+    COALESCE(SUM(cost_zone != 'high' AND NOT is_travel), 0),
+    COALESCE(SUM(cost_zone != 'high' AND is_travel), 0)
+FROM winners
+"""
+
+
+class ProjectStore:
+    """
+    Stores projects for any number of employees in a SQLite database, and calculates their reimbursement there.
+
+    Summaries are cached per employee and rate table, and only recalculated after that employee's projects have
+    changed, so a long-lived database with years of history only pays for the employees that actually received new
+    projects. Since the rates are part of the cache key, changing them never returns a stale summary.
+    """
+
+    def __init__(self, database: Union[str, Path] = ':memory:'):
+        self.connection = sqlite3.connect(str(database))
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self) -> 'ProjectStore':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def add_projects(self, data: Iterable[dict], employee: str = DEFAULT_EMPLOYEE) -> int:
+        """
+        Adds projects to the store. Each project may carry its own `employee`, otherwise `employee` is used.
+
+        :param data: Iterable of project dictionaries with start_date, end_date, and cost_zone.
+        :param employee: The employee to file projects under when they don't name one.
+        :return: The number of projects added.
+        """
+        rows = [
+            (
+                p.get(EMPLOYEE_COLUMN) or employee,
+                parse_date(p["start_date"]).toordinal(),
+                parse_date(p["end_date"]).toordinal(),
+                p["cost_zone"].lower(),
+            )
+            for p in data
+        ]
+
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO projects (employee, start_date, end_date, cost_zone) VALUES (?, ?, ?, ?)', rows
+            )
+            self.connection.executemany(
+                'DELETE FROM rate_summaries WHERE employee = ?', [(e,) for e in {row[0] for row in rows}]
+            )
+
+        return len(rows)
+
+    def load_csv(self, filename: Path, employee: str = DEFAULT_EMPLOYEE) -> int:
+        """
+        Loads a project CSV file into the store. See `add_projects`.
+
+        :param filename:
+        :param employee:
+        :return: The number of projects added.
+        """
+        with open(filename, 'r', newline='') as csv_file:
+            return self.add_projects(csv.DictReader(csv_file), employee=employee)
+
+    def employees(self) -> List[str]:
+        return [row[0] for row in self.connection.execute('SELECT DISTINCT employee FROM projects ORDER BY employee')]
+
+    def summary(self, employee: str = DEFAULT_EMPLOYEE, rates: RateTable = RateTable()) -> ReimbursementResult:
+        """
+        Returns the reimbursement for one employee, calculating (and caching) it if their projects have changed, or
+        if it hasn't been calculated with these rates before.
+
+        :param employee:
+        :param rates: The daily rates to use. Defaults to the rates in `constants`.
+        :return: A ReimbursementResult, identical to what `processor.process_data` returns for the same projects.
+        """
+        row = self.connection.execute(
+            'SELECT total, high_cost_full_days, high_cost_travel_days, low_cost_full_days, low_cost_travel_days '
+            'FROM rate_summaries WHERE employee = ? AND high_cost_full_day = ? AND high_cost_travel_day = ? '
+            'AND low_cost_full_day = ? AND low_cost_travel_day = ?',
+            (employee, *rates),
+        ).fetchone()
+
+        if row is None:
+            row = self._calculate(employee, rates)
+            with self.connection:
+                self.connection.execute(
+                    'INSERT INTO rate_summaries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (employee, *rates, *row)
+                )
+
+        return ReimbursementResult(*row)
+
+    def _calculate(self, employee: str, rates: RateTable) -> tuple:
+        parameters = {
+            'high_cost_full': rates.high_cost_full_day,
+            'high_cost_travel': rates.high_cost_travel_day,
+            'low_cost_full': rates.low_cost_full_day,
+            'low_cost_travel': rates.low_cost_travel_day,
+        }
+
+        with self.connection:
+            for table in ('ordered', 'merged', 'candidates'):
+                self.connection.execute(f'DELETE FROM temp.{table}')
+
+            self.connection.execute(_ORDER_PROJECTS, (employee,))
+            self.connection.execute(_MERGE_PROJECTS)
+            self.connection.execute(_EXPAND_DAYS, parameters)
+            return self.connection.execute(_SUMMARISE).fetchone()